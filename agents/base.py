@@ -41,6 +41,13 @@ except ImportError:
 
 from tools.prompt_io import read_prompt
 
+# Callback исследования связываем один раз, а не импортом на каждый запрос
+try:
+    from tools.callbacks import aresearch_validation_cycle
+except ImportError:
+    print("Warning: research callback not available")
+    aresearch_validation_cycle = None
+
 # New: helper to get task-specific prompt path
 
 
@@ -67,6 +74,8 @@ class BaseAgent(AssistantAgent):
     
     def __init__(self, name: str, model: str = "gpt-4o-mini", tier: str = "standard", *args, **kwargs):
         # Не присваиваем name напрямую, так как это property в AssistantAgent
+        # Хэш имени вычисляем один раз: агенты служат ключами в словарях маршрутизации
+        self._hash = hash(name)
         self.tier = tier
         self.model = model
         self._task_prompts = {}  # Для хранения task-specific промптов в памяти
@@ -252,7 +261,7 @@ class BaseAgent(AssistantAgent):
 
     def __hash__(self) -> int:
         """Make BaseAgent hashable for GroupChat compatibility."""
-        return hash(self.name)
+        return self._hash
 
     def __eq__(self, other: object) -> bool:
         """Equality comparison for BaseAgent."""
@@ -402,8 +411,8 @@ class BaseAgent(AssistantAgent):
         
         # Send research request through callback or direct message
         try:
-            from tools.callbacks import research_validation_cycle
-            research_validation_cycle(topic)
+            # Поиск идёт в потоке и не блокирует event loop остальных агентов
+            await aresearch_validation_cycle(topic)
             self._research_requests[request_id]['status'] = 'in_progress'
         except Exception as e:
             print(f"[{self.name}] Failed to request research: {e}")
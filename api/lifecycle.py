@@ -2,6 +2,7 @@
 Application lifecycle management (startup/shutdown)
 """
 import os
+import sys
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -84,6 +85,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
             await app.state.voice_processor.shutdown()
             logger.info("✅ Voice Processor shut down")
         
+        # Close the shared SpeechKit HTTP session (only if the module was used)
+        speechkit_module = sys.modules.get("tools.yandex_speechkit")
+        if speechkit_module is not None:
+            await speechkit_module.speechkit.close()
+            logger.info("✅ SpeechKit session closed")
+        
         # Cleanup component factory
         ComponentFactory.clear()
         logger.info("✅ Component factory cleared")
@@ -8,7 +8,7 @@ from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 # Import modular components
 from .lifecycle import lifespan
@@ -28,7 +28,8 @@ app = FastAPI(
     title="Root-MAS API",
     description="Multi-Agent System API with AutoGen 0.5+",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Setup middleware
@@ -47,7 +48,7 @@ if pwa_dir.exists():
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
-    return JSONResponse({
+    return ORJSONResponse({
         "name": "Root-MAS API",
         "version": "0.1.0",
         "status": "operational",
@@ -93,7 +94,7 @@ async def health_check():
             all("healthy" in status for status in db_status.values())
         )
         
-        return JSONResponse({
+        return ORJSONResponse({
             "status": "healthy" if all_healthy else "degraded",
             "services": {
                 "api": "healthy",
@@ -103,7 +104,7 @@ async def health_check():
         })
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={
                 "status": "unhealthy",
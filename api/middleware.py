@@ -8,24 +8,41 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from config.settings import ENVIRONMENT
 
 logger = logging.getLogger(__name__)
 
+ALLOWED_ORIGINS = (
+    "http://localhost:3000",
+    "http://localhost:8000",
+    "http://localhost:8080",
+    "https://your-domain.com",
+)
+
+
+class FrozenOriginsCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware with an O(1) frozenset origin check instead of a list scan"""
+    
+    def __init__(self, app, allow_origins=(), **kwargs):
+        super().__init__(app, allow_origins=list(allow_origins), **kwargs)
+        self._allow_origins_set = frozenset(allow_origins)
+    
+    def is_allowed_origin(self, origin: str) -> bool:
+        if self.allow_all_origins:
+            return True
+        if self.allow_origin_regex is not None and self.allow_origin_regex.fullmatch(origin):
+            return True
+        return origin in self._allow_origins_set
+
 
 def setup_middleware(app: FastAPI) -> None:
     """Setup all middleware for the application"""
     
     # CORS Middleware
     app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[
-            "http://localhost:3000",
-            "http://localhost:8000",
-            "http://localhost:8080",
-            "https://your-domain.com",
-        ],
+        FrozenOriginsCORSMiddleware,
+        allow_origins=ALLOWED_ORIGINS,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
@@ -44,20 +61,21 @@ def setup_middleware(app: FastAPI) -> None:
     # Custom request logging middleware
     @app.middleware("http")
     async def log_requests(request: Request, call_next):
-        start_time = time.time()
+        start_time = time.perf_counter()
+        method, path = request.method, request.url.path
         
-        # Log request
-        logger.info(f"📨 {request.method} {request.url.path}")
+        # Log request (%-форматирование: строка собирается только если INFO включён)
+        logger.info("📨 %s %s", method, path)
         
         # Process request
         response = await call_next(request)
         
         # Calculate process time
-        process_time = time.time() - start_time
+        process_time = time.perf_counter() - start_time
         response.headers["X-Process-Time"] = str(process_time)
         
         # Log response
-        logger.info(f"✅ {request.method} {request.url.path} - {response.status_code} ({process_time:.3f}s)")
+        logger.info("✅ %s %s - %s (%.3fs)", method, path, response.status_code, process_time)
         
         return response
     
@@ -66,7 +84,7 @@ def setup_middleware(app: FastAPI) -> None:
     async def global_exception_handler(request: Request, exc: Exception):
         logger.error(f"❌ Unhandled exception: {exc}", exc_info=True)
         
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "detail": "Internal server error",
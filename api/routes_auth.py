@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Header, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from .security import Token as AuthTokenModel, security_manager, SECRET_KEY, ALGORITHM
 from .security import Role
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Literal
 import jwt
 import time
 import os
@@ -11,8 +13,11 @@ router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 
 class AuthRequest(BaseModel):
-    user_id: str = Field(..., regex=r'^[a-zA-Z0-9_-]+$', max_length=100)
-    role: str = Field(default=Role.USER, regex=r'^(admin|user|agent|readonly)$')
+    # Все ограничения декларативные — проверяются в pydantic-core без Python-валидаторов
+    model_config = ConfigDict(extra="forbid")
+
+    user_id: str = Field(..., pattern=r'^[a-zA-Z0-9_-]+$', max_length=100)
+    role: Literal["admin", "user", "agent", "readonly"] = Role.USER
     scopes: list[str] = []
     expires_minutes: int | None = Field(default=None, ge=1, le=10080)
 
@@ -21,7 +26,7 @@ class RefreshRequest(BaseModel):
     refresh_token: str
 
 
-@router.post("/token", response_model=AuthTokenModel)
+@router.post("/token")
 async def issue_token(request: AuthRequest, x_admin_secret: str = Header(None)):
     expected = os.getenv("ADMIN_SECRET")
     if os.getenv("ENVIRONMENT", "production") == "production":
@@ -36,7 +41,8 @@ async def issue_token(request: AuthRequest, x_admin_secret: str = Header(None)):
     expires = timedelta(minutes=request.expires_minutes) if request.expires_minutes else None
     access = security_manager.create_access_token(data, expires)
     refresh = security_manager.create_refresh_token(data)
-    return AuthTokenModel(access_token=access, refresh_token=refresh)
+    # Отдаём готовый dict без повторной валидации через response_model
+    return ORJSONResponse(content={"access_token": access, "refresh_token": refresh, "token_type": "bearer"})
 
 
 @router.post("/refresh", response_model=AuthTokenModel)
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from typing import List, Dict, Any
 from .schemas import ChatMessage, ChatResponse
-from .security import rate_limit_dependency
+from .security import charge_rate_limit, optional_user_dependency, rate_limit_dependency
 from .services.chat import get_chat_service
 from .integration import mas_integration
 import time
@@ -14,7 +15,7 @@ logger = logging.getLogger(__name__)
 chat_service = get_chat_service(mas_integration)
 
 
-@router.post("/simple", response_model=ChatResponse, dependencies=[Depends(rate_limit_dependency)])
+@router.post("/simple", dependencies=[Depends(rate_limit_dependency)])
 async def simple_chat(message: ChatMessage, current_user: dict | None = None):
     """Простой чат без визуализации"""
     try:
@@ -22,18 +23,44 @@ async def simple_chat(message: ChatMessage, current_user: dict | None = None):
         await chat_service.initialize()
         
         # Process through service
-        return await chat_service.process_simple_chat(message, current_user)
+        response = await chat_service.process_simple_chat(message, current_user)
+        # ChatResponse уже провалидирован сервисом — сериализуем напрямую
+        return ORJSONResponse(content=response.model_dump())
     except Exception as e:
         logger.error(f"❌ Ошибка обработки сообщения: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("", response_model=ChatResponse, dependencies=[Depends(rate_limit_dependency)])
+@router.post("", dependencies=[Depends(rate_limit_dependency)])
 async def chat(message: ChatMessage, current_user: dict | None = None):
     """Основной эндпоинт чата - алиас для simple"""
     return await simple_chat(message, current_user)
 
 
+# Сколько сообщений принимает /batch за один запрос
+MAX_BATCH = 100
+
+
+@router.post("/batch")
+async def chat_batch(
+    request: Request,
+    messages: List[ChatMessage] = Body(...),
+    current_user: dict | None = Depends(optional_user_dependency),
+):
+    """Пакет сообщений за один запрос; ответы в порядке входа ({...} или {"error"})
+
+    Тело — JSON-массив сообщений. Лимит запросов списывается за каждое
+    сообщение, чтобы пакет не обходил ограничение одиночного чата.
+    """
+    if not messages:
+        raise HTTPException(status_code=422, detail="Empty batch")
+    if len(messages) > MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch too large: max {MAX_BATCH} messages")
+    charge_rate_limit(request, len(messages))
+    await chat_service.initialize()
+    return ORJSONResponse(content={"results": await chat_service.process_batch(messages, current_user)})
+
+
 @router.post("/message", response_model=ChatResponse, dependencies=[Depends(rate_limit_dependency)])
 async def message_with_visualization(message: ChatMessage, current_user: dict | None = None):
     return await chat_service.chat_with_visualization(message, current_user)
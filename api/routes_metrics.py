@@ -1,11 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse, Response
 from .schemas import SystemMetrics
-from .security import rate_limit_dependency
+from .security import rate_limit_dependency, auth_user_dependency, check_permission, Role
 from .services import metrics as metrics_service
 
 router = APIRouter(prefix="/api/v1", tags=["metrics"])
+prometheus_router = APIRouter(tags=["metrics"])
 
 
 @router.get("/metrics/dashboard", response_model=SystemMetrics, dependencies=[Depends(rate_limit_dependency)])
 async def dashboard(current_user: dict | None = None):
-    return await metrics_service.dashboard(current_user)
\ No newline at end of file
+    return await metrics_service.dashboard(current_user)
+
+
+@prometheus_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics(current_user: dict = Depends(auth_user_dependency)):
+    """Prometheus exposition; plain text as-is, without response_model validation"""
+    if not check_permission(current_user.get("role", Role.USER), "metrics:read"):
+        raise HTTPException(status_code=403, detail="Permission denied. Required: metrics:read")
+    try:
+        from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    except ImportError:
+        return Response(status_code=204)
+    return PlainTextResponse(generate_latest(), media_type=CONTENT_TYPE_LATEST)
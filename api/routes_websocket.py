@@ -1,12 +1,21 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from .integration import mas_integration
 import logging
-import json
+
+import orjson
 
 router = APIRouter(tags=["websocket"])
 logger = logging.getLogger(__name__)
 
 
+async def _send(websocket: WebSocket, payload: dict) -> None:
+    """Отправить payload, сериализованный через orjson.
+
+    Кадр остаётся текстовым: PWA разбирает ``event.data`` через ``JSON.parse``.
+    """
+    await websocket.send_text(orjson.dumps(payload).decode())
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket для real-time обмена сообщениями"""
@@ -15,9 +24,12 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             # Ждем сообщение от клиента
             data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_text("pong")
+                continue
             
             try:
-                message_data = json.loads(data)
+                message_data = orjson.loads(data)
                 user_message = message_data.get("message", "")
                 user_id = message_data.get("user_id", "websocket_user")
                 
@@ -25,20 +37,20 @@ async def websocket_endpoint(websocket: WebSocket):
                 response = await mas_integration.process_message(user_message, user_id)
                 
                 # Отправляем ответ
-                await websocket.send_json({
+                await _send(websocket, {
                     "type": "response",
                     "message": response,
                     "agent": "communicator"
                 })
                 
-            except json.JSONDecodeError:
-                await websocket.send_json({
+            except orjson.JSONDecodeError:
+                await _send(websocket, {
                     "type": "error",
                     "message": "Invalid JSON format"
                 })
             except Exception as e:
                 logger.error(f"WebSocket processing error: {e}")
-                await websocket.send_json({
+                await _send(websocket, {
                     "type": "error",
                     "message": str(e)
                 })
@@ -67,16 +79,16 @@ async def websocket_visualization(websocket: WebSocket):
         while True:
             data = await websocket.receive_text()
             try:
-                message = json.loads(data)
+                message = orjson.loads(data)
                 
                 if message.get("type") == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    await _send(websocket, {"type": "pong"})
                     
                 elif message.get("type") == "subscribe":
                     flow_id = message.get("flow_id")
                     if flow_id:
                         # Subscribe to flow updates
-                        await websocket.send_json({
+                        await _send(websocket, {
                             "type": "subscribed",
                             "flow_id": flow_id
                         })
@@ -87,13 +99,13 @@ async def websocket_visualization(websocket: WebSocket):
                     config = load_config()
                     agents = list(config.get('agents', {}).keys())
                     
-                    await websocket.send_json({
+                    await _send(websocket, {
                         "type": "agent_profiles",
                         "data": agents
                     })
                     
-            except json.JSONDecodeError:
-                await websocket.send_json({
+            except orjson.JSONDecodeError:
+                await _send(websocket, {
                     "type": "error",
                     "message": "Invalid JSON"
                 })
@@ -87,21 +87,30 @@ class RateLimiter:
             self.use_redis = False
             self.memory_store = {}
     
-    def check_rate_limit(self, key: str, limit: int, window: int) -> bool:
-        """Check if request is within rate limit"""
+    def check_rate_limit(self, key: str, limit: int, window: int, cost: int = 1) -> bool:
+        """Check if request is within rate limit
+
+        ``cost`` — сколько запросов списать разом (пакетные эндпоинты).
+        """
         current_time = int(time.time())
         window_start = current_time - window
         
         if self.use_redis:
             # Redis implementation
+            stamp = time.time_ns()
+            members = [f"{stamp}:{i}" for i in range(cost)]
             pipe = self.redis_client.pipeline()
             pipe.zremrangebyscore(key, 0, window_start)
             pipe.zcard(key)
-            pipe.zadd(key, {str(current_time): current_time})
+            pipe.zadd(key, dict.fromkeys(members, current_time))
             pipe.expire(key, window)
             results = pipe.execute()
             
-            return results[1] < limit
+            if results[1] + cost > limit:
+                # Отклонённый запрос не занимает слоты, как и в in-memory ветке
+                self.redis_client.zrem(key, *members)
+                return False
+            return True
         else:
             # In-memory fallback
             if key not in self.memory_store:
@@ -113,10 +122,10 @@ class RateLimiter:
                 if t > window_start
             ]
             
-            if len(self.memory_store[key]) >= limit:
+            if len(self.memory_store[key]) + cost > limit:
                 return False
             
-            self.memory_store[key].append(current_time)
+            self.memory_store[key].extend([current_time] * cost)
             return True
 
 rate_limiter = RateLimiter()
@@ -350,8 +359,20 @@ def auth_user_dependency(current: TokenData = Depends(get_current_user)) -> dict
     """Return a plain dict with user info for endpoints that accept current_user: dict."""
     return {"user_id": current.user_id, "scopes": current.scopes, "role": current.role}
 
-def rate_limit_dependency(request: Request):
-    """Rate limiting dependency"""
+_optional_bearer = HTTPBearer(auto_error=False)
+
+
+async def optional_user_dependency(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_optional_bearer)
+) -> Optional[dict]:
+    """Как auth_user_dependency, но без токена возвращает None."""
+    if credentials is None:
+        return None
+    current = security_manager.verify_token(credentials.credentials)
+    return {"user_id": current.user_id, "scopes": current.scopes, "role": current.role}
+
+def charge_rate_limit(request: Request, cost: int = 1) -> None:
+    """Списать ``cost`` запросов из лимита клиента на этом эндпоинте (429 при превышении)"""
     client_ip = request.client.host
     if TRUST_PROXY:
         fwd = request.headers.get('x-forwarded-for') or request.headers.get('X-Forwarded-For')
@@ -365,7 +386,8 @@ def rate_limit_dependency(request: Request):
     if not rate_limiter.check_rate_limit(
         rate_limit_key, 
         RATE_LIMIT_REQUESTS, 
-        RATE_LIMIT_WINDOW
+        RATE_LIMIT_WINDOW,
+        cost
     ):
         logger.warning("Rate limit exceeded for %s on %s", client_ip, endpoint)
         raise HTTPException(
@@ -373,6 +395,10 @@ def rate_limit_dependency(request: Request):
             detail=f"Rate limit exceeded. Max {RATE_LIMIT_REQUESTS} requests per {RATE_LIMIT_WINDOW} seconds."
         )
 
+def rate_limit_dependency(request: Request):
+    """Rate limiting dependency"""
+    charge_rate_limit(request)
+
 def require_permission(permission: str):
     """Decorator to require specific permission"""
     def decorator(func):
@@ -1,7 +1,7 @@
 """
 Agents service for handling agent operations
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base import BaseService
 from core.interfaces import IMessageProcessor
 from config.config_loader import load_config
@@ -15,6 +15,8 @@ class AgentsService(BaseService):
         super().__init__()
         self.message_processor = message_processor
         self.config = None
+        # Профили зависят только от конфига: собираются один раз
+        self._profiles: Optional[List[AgentProfile]] = None
     
     async def _setup(self) -> None:
         """Initialize agents service resources"""
@@ -45,6 +47,8 @@ class AgentsService(BaseService):
     
     def get_agent_profiles(self) -> List[AgentProfile]:
         """Get agent profiles for visualization"""
+        if self._profiles is not None:
+            return list(self._profiles)
         try:
             if not self.config:
                 self.config = load_config()
@@ -64,7 +68,8 @@ class AgentsService(BaseService):
                 )
                 profiles.append(profile)
             
-            return profiles
+            self._profiles = profiles
+            return list(profiles)
             
         except Exception as e:
             self.logger.error(f"Error getting agent profiles: {e}")
@@ -2,11 +2,12 @@
 Chat service for handling chat operations
 """
 import time
-import json
 import asyncio
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+import orjson
+
 from .base import BaseService
 from ..schemas import ChatMessage, ChatResponse
 from core.interfaces import IMessageProcessor
@@ -55,6 +56,33 @@ class ChatService(BaseService):
             timestamp=time.time()
         )
     
+    async def process_batch(
+        self, messages: List[ChatMessage], current_user: Optional[dict] = None
+    ) -> List[Dict[str, Any]]:
+        """Process several messages in one call, keeping the input order.
+
+        Messages of different users run concurrently; messages of one user
+        run one after another so their history updates do not overwrite
+        each other.
+        """
+        results: List[Dict[str, Any]] = [{} for _ in messages]
+        by_user: Dict[str, List[int]] = {}
+        for i, message in enumerate(messages):
+            user_id = current_user["user_id"] if current_user else message.user_id
+            by_user.setdefault(user_id, []).append(i)
+        
+        async def run_user(indices: List[int]) -> None:
+            for i in indices:
+                try:
+                    response = await self.process_simple_chat(messages[i], current_user)
+                    results[i] = response.model_dump()
+                except Exception as e:
+                    self.logger.error(f"Error processing batch item {i}: {e}")
+                    results[i] = {"error": str(e)}
+        
+        await asyncio.gather(*(run_user(indices) for indices in by_user.values()))
+        return results
+    
     async def process_chat_with_visualization(self, message: ChatMessage, current_user: Optional[dict] = None) -> Dict[str, Any]:
         """Process chat with visualization data"""
         user_id = current_user["user_id"] if current_user else message.user_id
@@ -94,7 +122,7 @@ class ChatService(BaseService):
         await asyncio.to_thread(
             self.store.set, 
             flow_key, 
-            json.dumps(visualization_data), 
+            orjson.dumps(visualization_data).decode(), 
             3600
         )
         
@@ -113,7 +141,7 @@ class ChatService(BaseService):
         try:
             raw_history = await asyncio.to_thread(self.store.get, history_key)
             if raw_history:
-                all_messages = json.loads(raw_history)
+                all_messages = orjson.loads(raw_history)
                 messages = all_messages[offset:offset + limit]
                 return {
                     "history": messages,
@@ -140,7 +168,7 @@ class ChatService(BaseService):
         try:
             # Get existing history
             raw_history = await asyncio.to_thread(self.store.get, history_key)
-            history = json.loads(raw_history) if raw_history else []
+            history = orjson.loads(raw_history) if raw_history else []
             
             # Add new message
             history.append({
@@ -154,7 +182,7 @@ class ChatService(BaseService):
                 history = history[-self.max_history_size:]
             
             # Save back
-            await asyncio.to_thread(self.store.set, history_key, json.dumps(history))
+            await asyncio.to_thread(self.store.set, history_key, orjson.dumps(history).decode())
             
         except Exception as e:
             self.logger.error(f"Error saving to history: {e}")
@@ -6,13 +6,19 @@ from typing import Dict, List, Type, TypeVar
 
 import yaml
 
+try:  # libyaml C-парсер, если PyYAML собран с ним
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover - pure-Python fallback
+    from yaml import SafeLoader
+
 T = TypeVar("T")
 
 
 def _load_yaml(path: Path | str) -> Dict:
     path = Path(path)
-    with path.open("r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+    # Бинарный поток: libyaml сам декодирует UTF-8 без промежуточной str
+    with path.open("rb") as f:
+        return yaml.load(f, Loader=SafeLoader) or {}
 
 
 def load_dataclass(path: Path | str, cls: Type[T]) -> T:
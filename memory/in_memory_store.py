@@ -11,6 +11,11 @@ from typing import Any, Optional, Dict, Tuple
 from threading import Lock
 
 
+# Полная очистка истекших ключей выполняется раз в N записей, а не на каждой:
+# истечение конкретного ключа проверяется лениво при чтении.
+_SWEEP_EVERY = 1024
+
+
 class InMemoryStore:
     """In-memory хранилище с поддержкой TTL как fallback для Redis."""
     
@@ -18,6 +23,7 @@ class InMemoryStore:
         # Игнорируем параметры подключения, так как это in-memory
         self._data: Dict[str, Tuple[Any, float]] = {}  # key -> (value, expiry_time)
         self._lock = Lock()
+        self._writes = 0
         self.host = "memory"
         self.port = 0
         self.db = 0
@@ -37,12 +43,14 @@ class InMemoryStore:
         with self._lock:
             expiry_time = time.time() + ttl if ttl > 0 else None
             self._data[key] = (value, expiry_time)
-            self._cleanup_expired()
+            self._writes += 1
+            if self._writes >= _SWEEP_EVERY:
+                self._writes = 0
+                self._cleanup_expired()
     
     def get(self, key: str) -> Optional[Any]:
         """Получить значение, если оно существует и не истекло."""
         with self._lock:
-            self._cleanup_expired()
             if key in self._data:
                 value, expiry = self._data[key]
                 if expiry is None or expiry > time.time():
@@ -59,7 +67,6 @@ class InMemoryStore:
     def exists(self, key: str) -> bool:
         """Проверить наличие ключа."""
         with self._lock:
-            self._cleanup_expired()
             if key in self._data:
                 _, expiry = self._data[key]
                 if expiry is None or expiry > time.time():
@@ -95,10 +102,13 @@ class InMemoryStore:
         with self._lock:
             if key in self._data:
                 _, expiry = self._data[key]
-                if expiry:
-                    remaining = int(expiry - time.time())
-                    return max(0, remaining)
-                return -1  # Нет TTL
+                if expiry is None:
+                    return -1  # Нет TTL
+                now = time.time()
+                if expiry > now:
+                    return int(expiry - now)
+                # Истёк, но ещё не вычищен — как в get/exists
+                del self._data[key]
             return -2  # Ключ не существует
     
     def setex(self, name: str, time: int, value: Any) -> None:
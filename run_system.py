@@ -171,22 +171,20 @@ async def main():
             logger.error("❌ Нет компонентов для запуска")
             sys.exit(1)
         
-        # Обработчик сигналов
+        # Обработчик сигналов: будит stop_event прямо в event loop
+        # (lock-файл удаляется в finally)
         stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
         
-        def signal_handler(signum, frame):
+        def signal_handler(signum):
             logger.info(f"🛑 Получен сигнал {signum}, останавливаем систему...")
             stop_event.set()
-            # Удаляем lock-файл при получении сигнала
-            lock_file = Path("run_system.lock")
-            if lock_file.exists():
-                try:
-                    lock_file.unlink()
-                except Exception:
-                    pass
         
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, signal_handler, sig)
+            except NotImplementedError:  # pragma: no cover - Windows
+                signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(signal_handler, signum))
         
         logger.info("✅ Все компоненты запущены!")
         logger.info("📝 Для остановки нажмите Ctrl+C")
@@ -73,8 +73,7 @@ async def minimal_test_server():
         logger.info("💤 Running in sleep mode (dependencies missing)")
         
         # Просто ждем сигнала остановки
-        while not _shutdown_event.is_set():
-            await asyncio.sleep(1)
+        await _shutdown_event.wait()
 
 
 async def main():
@@ -97,13 +96,18 @@ async def main():
     environment = os.getenv("ENVIRONMENT", "development")
     logger.info(f"🌍 Environment: {environment}")
     
-    # Обработчик сигналов
-    def signal_handler(signum, frame):
+    # Обработчик сигналов: будит _shutdown_event прямо в event loop
+    loop = asyncio.get_running_loop()
+    
+    def signal_handler(signum):
         logger.info(f"🛑 Received signal {signum}, shutting down...")
         _shutdown_event.set()
     
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, signal_handler, sig)
+        except NotImplementedError:  # pragma: no cover - Windows
+            signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(signal_handler, signum))
     
     # Создаем задачи
     tasks = []
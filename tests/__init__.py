@@ -1,7 +0,0 @@
-import sys
-from pathlib import Path
-
-# Ensure project root is on the import path
-ROOT = Path(__file__).resolve().parents[1]
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,187 @@
+"""Общие фикстуры для тестов Root-MAS."""
+
+import os
+import subprocess
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import pytest
+
+# Корень проекта в sys.path — один раз на сессию, а не в каждом модуле
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# uvloop (приходит с uvicorn[standard]) — политика event loop для всех async-тестов
+try:
+    import asyncio
+
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:  # pragma: no cover - Windows или без uvloop
+    pass
+
+
+def _load(path):
+    """Прочитать YAML через libyaml (CSafeLoader)."""
+    from yaml import CSafeLoader, load
+
+    with open(path, "rb") as f:
+        return load(f, Loader=CSafeLoader)
+
+
+@pytest.fixture(scope="session")
+def load_yaml():
+    return _load
+
+
+@lru_cache(maxsize=1)
+def _cached_agents_cfg():
+    """Разобрать config/agents.yaml один раз на процесс."""
+    from config.config_loader import AgentsConfig
+
+    return AgentsConfig.from_yaml("config/agents.yaml")
+
+
+# Агенты по ключу ((name, все поля AgentDefinition), ...): одинаковый конфиг
+# собирается один раз. Словари агентов общие — тесты должны только читать их.
+_AGENTS_CACHE: dict = {}
+
+
+def _agents_key(cfg):
+    from dataclasses import astuple
+
+    return tuple((name, astuple(d)) for name, d in cfg.agents.items())
+
+
+def _create_agents_cached(cfg):
+    key = _agents_key(cfg)
+    if key not in _AGENTS_CACHE:
+        from agents.core_agents import create_agents
+
+        _AGENTS_CACHE[key] = create_agents(cfg)
+    return _AGENTS_CACHE[key]
+
+
+def _cached_agents():
+    """Создать агентов по config/agents.yaml один раз на процесс."""
+    return _create_agents_cached(_cached_agents_cfg())
+
+
+@pytest.fixture(scope="session")
+def agents_cfg():
+    """AgentsConfig из config/agents.yaml, общий для всей сессии."""
+    return _cached_agents_cfg()
+
+
+def _require_openrouter_key():
+    if not os.getenv("OPENROUTER_API_KEY"):
+        pytest.skip("OPENROUTER_API_KEY не задан — агенты не могут быть созданы")
+
+
+@pytest.fixture(scope="session")
+def agents():
+    """Агенты из config/agents.yaml, общие для всей сессии."""
+    _require_openrouter_key()
+    return _cached_agents()
+
+
+@pytest.fixture(scope="session")
+def dummy_prompt_io():
+    """Заглушка модуля prompt_io, регистрируется один раз на сессию."""
+    import types
+
+    dummy = types.ModuleType("prompt_io")
+    dummy.read_prompt = lambda p: ""
+    return sys.modules.setdefault("prompt_io", dummy)
+
+
+@pytest.fixture(scope="session")
+def agents_factory(dummy_prompt_io):
+    """create_agents с мемоизацией по полному содержимому конфига."""
+    _require_openrouter_key()
+    return _create_agents_cached
+
+
+@pytest.fixture(scope="session")
+def redis_store():
+    """Один RedisStore с in-memory fallback на всю сессию."""
+    from memory.redis_store import RedisStore
+
+    return RedisStore(use_fallback=True)
+
+
+class DummyResponse:
+    """Минимальный двойник ``requests.Response`` для HTTP-стабов."""
+
+    def __init__(self, json_data=None, status=200):
+        self._json = json_data or {}
+        self.status_code = status
+
+    def json(self):
+        return self._json
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code}")
+
+
+@pytest.fixture(scope="session")
+def dummy_response():
+    return DummyResponse
+
+
+# Окружение тестов; setdefault не перетирает значения, заданные CI
+_TEST_ENV = {
+    "ENVIRONMENT": "testing",
+    "MAS_SECRET_KEY": "test-secret-key",
+    "ADMIN_SECRET": "test-admin-secret",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "DATA_PATH": "/tmp/test-data",
+}
+
+
+def pytest_configure(config):
+    """Выставить окружение один раз, до сбора и импорта тестовых модулей."""
+    for key, value in _TEST_ENV.items():
+        os.environ.setdefault(key, value)
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    """Один TestClient(app) на сессию: приложение собирается единожды."""
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def admin_headers(api_client):
+    r = api_client.post(
+        "/api/v1/auth/token",
+        json={"user_id": "admin", "role": "admin"},
+        headers={"X-Admin-Secret": os.environ["ADMIN_SECRET"]},
+    )
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+# Один неизменяемый результат на все подменённые вызовы; команды пишутся в calls
+_FAKE_CP = subprocess.CompletedProcess([], 0, stdout="LOG", stderr="")
+
+
+@pytest.fixture
+def fake_subprocess(monkeypatch):
+    """Подменить subprocess.run; возвращает список вызовов (cmd, cwd, kwargs)."""
+    calls = []
+
+    def _run(cmd, cwd=None, **kwargs):
+        calls.append((cmd, cwd, kwargs))
+        return _FAKE_CP
+
+    monkeypatch.setattr(subprocess, "run", _run)
+    return calls
@@ -0,0 +1,313 @@
+import gc
+import json
+import weakref
+
+import pytest
+
+from tools import ab_testing as ab_module
+from tools.ab_testing import ABTestingManager
+from tools.event_sourcing import EventType
+from tools.quality_metrics import TaskResult
+
+
+def _task(i, status="success", confidence=0.8, response_time=1.0, cost=0.01):
+    return TaskResult(
+        task_id=f"t{i}",
+        agent_name="meta",
+        task_type="general",
+        status=status,
+        confidence=confidence,
+        response_time=response_time,
+        model_used="m",
+        tier_used="cheap",
+        token_cost=cost,
+    )
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return ABTestingManager(storage_path=str(tmp_path))
+
+
+@pytest.fixture
+def experiment(manager):
+    exp_id = manager.create_experiment(
+        "demo", "meta", "control prompt", [("B", "test prompt")], min_sample_size=1000
+    )
+    return manager.experiments[exp_id]
+
+
+def _record(manager, experiment):
+    control = experiment.control_variant.id
+    test = experiment.test_variants[0].id
+    manager.record_result(experiment.id, control, _task(0, confidence=0.6, response_time=2.0))
+    manager.record_result(experiment.id, control, _task(1, status="failure", confidence=0.1))
+    manager.record_result(experiment.id, test, _task(2, confidence=0.9, cost=0.03), user_satisfaction=4)
+    return control, test
+
+
+def test_analyze_from_aggregates(manager, experiment):
+    control, test = _record(manager, experiment)
+
+    analysis = manager.analyze_experiment(experiment.id)
+
+    c = analysis["variant_metrics"][control]
+    assert c["total_count"] == 2 and c["success_count"] == 1
+    assert c["success_rate"] == 0.5
+    assert c["avg_confidence"] == pytest.approx(0.6)
+    assert c["avg_response_time"] == pytest.approx(1.5)
+    assert "avg_satisfaction" not in c
+    t = analysis["variant_metrics"][test]
+    assert t["avg_satisfaction"] == 4
+    assert t["cost_per_success"] == pytest.approx(0.03)
+    assert analysis["sample_sizes"] == {control: 2, test: 1}
+
+
+def test_reload_rebuilds_aggregates(manager, experiment, tmp_path):
+    _record(manager, experiment)
+    manager.save_experiments()
+
+    reloaded = ABTestingManager(storage_path=str(tmp_path))
+
+    assert reloaded.analyze_experiment(experiment.id) == manager.analyze_experiment(experiment.id)
+
+
+def test_analyze_without_results(manager, experiment):
+    assert manager.analyze_experiment(experiment.id) == {"error": "No results yet"}
+
+
+def test_variant_assignment_is_sticky_per_user(manager, experiment):
+    first = manager.get_variant_for_task("meta", user_id="user-1")
+    assert first is not None
+    assert all(manager.get_variant_for_task("meta", user_id="user-1") is first for _ in range(5))
+    ids = {manager.get_variant_for_task("meta", user_id=f"u{i}").id for i in range(200)}
+    assert ids == {experiment.control_variant.id, experiment.test_variants[0].id}
+
+
+def test_variant_lookup_scoped_to_agent(manager, experiment):
+    other = manager.create_experiment("other", "researcher", "c", [("B", "t")], min_sample_size=1000)
+    assert manager.get_variant_for_task("meta", user_id="u").id.startswith(experiment.id)
+    assert manager.get_variant_for_task("researcher", user_id="u").id.startswith(other)
+    assert manager.get_variant_for_task("communicator", user_id="u") is None
+
+    experiment.status = "paused"
+    assert manager.get_variant_for_task("meta", user_id="u") is None
+
+
+def test_results_appended_as_jsonl(manager, experiment):
+    _record(manager, experiment)
+    manager.save_experiments()
+
+    lines = (manager.results_dir / f"{experiment.id}.jsonl").read_text().splitlines()
+    assert [json.loads(line)["task_id"] for line in lines] == ["t0", "t1", "t2"]
+    assert not (manager.storage_path / "results.json").exists()
+
+
+def test_legacy_results_json_is_migrated(manager, experiment, tmp_path):
+    _record(manager, experiment)
+    manager.save_experiments()
+    expected = manager.analyze_experiment(experiment.id)
+    manager.close()
+    jsonl = manager.results_dir / f"{experiment.id}.jsonl"
+    rows = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    (tmp_path / "results.json").write_text(json.dumps({experiment.id: rows}))
+    jsonl.unlink()
+
+    reloaded = ABTestingManager(storage_path=str(tmp_path))
+
+    assert reloaded.analyze_experiment(experiment.id) == expected
+    assert jsonl.exists() and not (tmp_path / "results.json").exists()
+
+
+def test_iso_timestamps_still_load(manager, experiment, tmp_path):
+    _record(manager, experiment)
+    manager.save_experiments()
+    manager.close()
+    jsonl = manager.results_dir / f"{experiment.id}.jsonl"
+    rows = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    assert all(isinstance(r["timestamp"], float) for r in rows)
+    for r in rows:
+        r["timestamp"] = "2025-01-01T00:00:00+00:00"
+    jsonl.write_text("".join(json.dumps(r) + "\n" for r in rows))
+
+    reloaded = ABTestingManager(storage_path=str(tmp_path))
+
+    result = reloaded.results[experiment.id][experiment.control_variant.id][0]
+    assert result.timestamp_dt.year == 2025
+    assert reloaded.experiments[experiment.id].start_date == experiment.start_date
+
+
+def test_completion_without_running_loop_queues_event(manager, monkeypatch):
+    exp_id = manager.create_experiment("quick", "meta", "a", [("B", "b")], min_sample_size=1)
+    experiment = manager.experiments[exp_id]
+    monkeypatch.setattr(
+        manager, "analyze_experiment", lambda _id: {"has_winner": True, "winner": "B", "improvement": 0.1}
+    )
+
+    manager.record_result(exp_id, experiment.control_variant.id, _task(0))
+    manager.record_result(exp_id, experiment.test_variants[0].id, _task(1))
+
+    assert experiment.status == "completed"
+    assert len(manager._events) == 1
+
+    logged = []
+
+    async def log_system_event(event_type, details):
+        logged.append((event_type, details["experiment_id"]))
+
+    monkeypatch.setattr(ab_module.event_logger, "log_system_event", log_system_event)
+    manager.close()
+    # close() дописывает событие, которое некому было записать
+    assert logged == [(EventType.PROMPT_UPDATED, exp_id)] and not manager._events
+
+
+def test_traffic_split_thresholds(manager, monkeypatch):
+    exp_id = manager.create_experiment(
+        "split", "coder", "a", [("B", "b"), ("C", "c")], traffic_split=None
+    )
+    experiment = manager.experiments[exp_id]
+    ids = list(experiment.traffic_split)
+    assert experiment._variant_ids == tuple(ids)
+    assert experiment._cum[-1] == pytest.approx(1.0)
+
+    for value, expected in ((0.0, ids[0]), (0.34, ids[1]), (0.99, ids[2])):
+        monkeypatch.setattr("tools.ab_testing.random.random", lambda: value)
+        assert manager.get_variant_for_task("coder").id == expected
+
+
+def test_two_prop_p():
+    from tools.ab_testing import _two_prop_p
+
+    assert _two_prop_p(50, 100, 50, 100) == pytest.approx(1.0)
+    assert _two_prop_p(10, 10, 10, 10) == 1.0
+    # 40% против 60% на 100+100: z ~ 2.83, p ~ 0.005
+    assert _two_prop_p(40, 100, 60, 100) < 0.01
+    assert _two_prop_p(45, 100, 55, 100) > 0.05
+
+
+def test_winner_by_success_rate(manager, experiment):
+    control = experiment.control_variant.id
+    test = experiment.test_variants[0].id
+    for i in range(100):
+        manager.record_result(experiment.id, control, _task(i, status="success" if i < 40 else "failure"))
+        manager.record_result(experiment.id, test, _task(i, status="success" if i < 60 else "failure"))
+
+    analysis = manager.analyze_experiment(experiment.id)
+
+    assert analysis["has_winner"] and analysis["winner"] == test
+    assert analysis["p_values"][test]["success_rate"] < 0.05
+
+
+def test_t_two_sided_p():
+    from tools.ab_testing import _t_two_sided_p
+
+    # табличные критические значения t для alpha = 0.05
+    assert _t_two_sided_p(2.228, 10) == pytest.approx(0.05, abs=1e-3)
+    assert _t_two_sided_p(1.96, 1e6) == pytest.approx(0.05, abs=1e-3)
+    assert _t_two_sided_p(0.0, 5) == pytest.approx(1.0)
+
+
+def test_winner_by_response_time(manager):
+    exp_id = manager.create_experiment(
+        "latency", "coder", "a", [("B", "b")], significance_metrics=["avg_response_time"]
+    )
+    experiment = manager.experiments[exp_id]
+    control = experiment.control_variant.id
+    test = experiment.test_variants[0].id
+    for i in range(30):
+        manager.record_result(exp_id, control, _task(i, response_time=2.0 + (i % 3) * 0.1))
+        manager.record_result(exp_id, test, _task(i, response_time=1.0 + (i % 3) * 0.1))
+
+    analysis = manager.analyze_experiment(exp_id)
+
+    assert analysis["winner"] == test
+    assert analysis["improvement"] == pytest.approx(1.0 / 2.1)
+    assert set(analysis["p_values"][test]) == {"avg_response_time"}
+
+
+def test_unknown_significance_metric(manager):
+    with pytest.raises(ValueError):
+        manager.create_experiment("x", "coder", "a", [("B", "b")], significance_metrics=["speed"])
+
+
+def test_large_effect_stops_early(manager, experiment):
+    control = experiment.control_variant.id
+    test = experiment.test_variants[0].id
+    for i in range(100):
+        manager.record_result(experiment.id, control, _task(i, status="success" if i % 10 == 0 else "failure"))
+        manager.record_result(experiment.id, test, _task(i, status="failure" if i % 10 == 0 else "success"))
+        if experiment.status == "completed":
+            break
+
+    assert experiment.status == "completed"
+    assert i < experiment.min_sample_size
+    assert manager.analyze_experiment(experiment.id)["winner"] == test
+
+
+def test_save_skips_unchanged_metadata(manager, experiment, tmp_path):
+    meta = tmp_path / "experiments.json"
+    mtime = meta.stat().st_mtime_ns
+    _record(manager, experiment)
+
+    manager.save_experiments()
+
+    assert meta.stat().st_mtime_ns == mtime
+    assert len((tmp_path / "results" / f"{experiment.id}.jsonl").read_bytes().splitlines()) == 3
+
+
+def test_is_active_uses_epoch_now(experiment):
+    from datetime import datetime, timezone
+
+    experiment.end_date = datetime.fromtimestamp(1_000.0, tz=timezone.utc)
+    assert experiment.is_active(999.0)
+    assert not experiment.is_active(1_000.0)
+    assert not experiment.is_active()
+
+
+def test_results_reservoir_is_bounded(tmp_path):
+    manager = ABTestingManager(storage_path=str(tmp_path), reservoir_size=5)
+    exp_id = manager.create_experiment("r", "meta", "a", [("B", "b")], min_sample_size=1000)
+    control = manager.experiments[exp_id].control_variant.id
+    for i in range(50):
+        manager.record_result(exp_id, control, _task(i, response_time=float(i)))
+
+    assert len(manager.results[exp_id][control]) == 5
+    assert manager.agg[exp_id][control].total_count == 50
+    assert manager.analyze_experiment(exp_id)["variant_metrics"][control]["avg_response_time"] == pytest.approx(24.5)
+
+
+def test_completed_experiment_survives_restart(manager, experiment, tmp_path):
+    control = experiment.control_variant.id
+    test = experiment.test_variants[0].id
+    for i in range(100):
+        manager.record_result(experiment.id, control, _task(i, status="success" if i % 10 == 0 else "failure"))
+        manager.record_result(experiment.id, test, _task(i, status="failure" if i % 10 == 0 else "success"))
+        if experiment.status == "completed":
+            break
+    manager.close()
+
+    reloaded = ABTestingManager(storage_path=str(tmp_path))
+
+    assert reloaded.experiments[experiment.id].status == "completed"
+    assert reloaded.get_winning_prompt("meta") == "test prompt"
+
+
+def test_dropped_manager_is_collected_and_closes_files(tmp_path):
+    manager = ABTestingManager(storage_path=str(tmp_path))
+    exp_id = manager.create_experiment("demo", "meta", "control prompt", [("B", "test prompt")])
+    experiment = manager.experiments[exp_id]
+    _record(manager, experiment)
+    manager.close()
+    manager.close()  # повторный close ничего не ломает
+    manager.record_result(exp_id, experiment.control_variant.id, _task(3))
+    fp = manager._results_fp[exp_id]
+    ref = weakref.ref(manager)
+
+    del manager, experiment
+    gc.collect()
+
+    # менеджер не удерживается до выхода, его JSONL сброшен и закрыт
+    assert ref() is None
+    assert fp.closed
+    lines = (tmp_path / "results" / f"{exp_id}.jsonl").read_text().splitlines()
+    assert [json.loads(line)["task_id"] for line in lines] == ["t0", "t1", "t2", "t3"]
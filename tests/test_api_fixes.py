@@ -1,21 +1,21 @@
 """
 Tests for critical API fixes
 """
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-import os
-import sys
+from functools import lru_cache
 
-# Add project root to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Set test environment
-os.environ["ENVIRONMENT"] = "testing"
-os.environ["MAS_SECRET_KEY"] = "test-secret-key"
-os.environ["ADMIN_SECRET"] = "test-admin-secret"
-os.environ["REDIS_HOST"] = "localhost"
-os.environ["REDIS_PORT"] = "6379"
-os.environ["DATA_PATH"] = "/tmp/test-data"
+@lru_cache(maxsize=8)
+def _token(user_id: str, role: str = "user") -> str:
+    """Access token per (user_id, role), issued once per test session.
+
+    Tokens are created directly via security_manager instead of going through
+    /api/v1/auth/token; the endpoint itself is covered by TestAuthSecurity.
+    """
+    from api.security import security_manager
+    return security_manager.create_access_token({"sub": user_id, "role": role, "scopes": []})
 
 
 class TestAPIImports:
@@ -70,10 +70,10 @@ class TestAuthSecurity:
         from api.main import app
         return TestClient(app)
     
-    def test_token_issue_requires_secret(self, client):
+    def test_token_issue_requires_secret(self, client, monkeypatch):
         """Test that token issuance requires admin secret in production"""
         # Set production environment
-        os.environ["ENVIRONMENT"] = "production"
+        monkeypatch.setenv("ENVIRONMENT", "production")
         
         # Without X-Admin-Secret header
         response = client.post(
@@ -101,9 +101,9 @@ class TestAuthSecurity:
         assert "access_token" in data
         assert "refresh_token" in data
     
-    def test_token_validation(self, client):
+    def test_token_validation(self, client, monkeypatch):
         """Test input validation for auth endpoint"""
-        os.environ["ENVIRONMENT"] = "development"
+        monkeypatch.setenv("ENVIRONMENT", "development")
         
         # Invalid user_id format
         response = client.post(
@@ -131,61 +131,51 @@ class TestProtectedEndpoints:
     """Test that sensitive endpoints are protected"""
     
     @pytest.fixture
-    def client(self):
+    async def aclient(self):
+        """Async ASGI client: requests are dispatched in-loop, no TestClient thread hop"""
+        import httpx
         from api.main import app
-        return TestClient(app)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
     
     @pytest.fixture
-    def auth_headers(self, client):
+    def auth_headers(self):
         """Get auth headers with admin token"""
-        os.environ["ENVIRONMENT"] = "development"
-        response = client.post(
-            "/api/v1/auth/token",
-            json={"user_id": "admin_user", "role": "admin"}
-        )
-        token = response.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
+        return {"Authorization": f"Bearer {_token('admin_user', 'admin')}"}
     
     @pytest.fixture
-    def user_headers(self, client):
+    def user_headers(self):
         """Get auth headers with user token"""
-        os.environ["ENVIRONMENT"] = "development"
-        response = client.post(
-            "/api/v1/auth/token",
-            json={"user_id": "regular_user", "role": "user"}
-        )
-        token = response.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
+        return {"Authorization": f"Bearer {_token('regular_user', 'user')}"}
     
-    def test_rollback_requires_admin(self, client, user_headers, auth_headers):
+    @pytest.mark.asyncio
+    async def test_rollback_requires_admin(self, aclient, user_headers, auth_headers):
         """Test that rollback endpoints require admin role"""
-        # Test without auth
-        response = client.post("/api/v1/registry/tools/test/rollback")
-        assert response.status_code == 403
-        
-        # Test with user role
-        response = client.post(
-            "/api/v1/registry/tools/test/rollback",
-            headers=user_headers
+        url = "/api/v1/registry/tools/test/rollback"
+        anonymous, user, admin = await asyncio.gather(
+            aclient.post(url),
+            aclient.post(url, headers=user_headers),
+            aclient.post(url, headers=auth_headers),
         )
-        assert response.status_code == 403
-        
-        # Test with admin role (will fail because tool doesn't exist, but auth passes)
-        response = client.post(
-            "/api/v1/registry/tools/test/rollback",
-            headers=auth_headers
-        )
-        assert response.status_code in [400, 404]  # Not 403
+        # Without auth
+        assert anonymous.status_code == 403
+        # With user role
+        assert user.status_code == 403
+        # With admin role (will fail because tool doesn't exist, but auth passes)
+        assert admin.status_code in [400, 404]  # Not 403
     
-    def test_metrics_requires_auth(self, client, user_headers):
+    @pytest.mark.asyncio
+    async def test_metrics_requires_auth(self, aclient, user_headers):
         """Test that metrics endpoint requires authentication"""
+        anonymous, user = await asyncio.gather(
+            aclient.get("/metrics"),
+            aclient.get("/metrics", headers=user_headers),
+        )
         # Without auth
-        response = client.get("/metrics")
-        assert response.status_code == 403
-        
+        assert anonymous.status_code == 403
         # With auth (user has metrics:read permission)
-        response = client.get("/metrics", headers=user_headers)
-        assert response.status_code in [200, 204]  # Prometheus might not be installed
+        assert user.status_code in [200, 204]  # Prometheus might not be installed
 
 
 class TestCORSConfiguration:
@@ -235,15 +225,9 @@ class TestInputValidation:
         return TestClient(app)
     
     @pytest.fixture
-    def auth_headers(self, client):
+    def auth_headers(self):
         """Get auth headers"""
-        os.environ["ENVIRONMENT"] = "development"
-        response = client.post(
-            "/api/v1/auth/token",
-            json={"user_id": "test_user"}
-        )
-        token = response.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
+        return {"Authorization": f"Bearer {_token('test_user')}"}
     
     def test_chat_message_validation(self, client, auth_headers):
         """Test chat message validation"""
@@ -1,18 +1,6 @@
-import os
-from fastapi.testclient import TestClient
-
-os.environ["ENVIRONMENT"] = "testing"
-os.environ["MAS_SECRET_KEY"] = "test-secret"
-os.environ["ADMIN_SECRET"] = "test-admin-secret"
-
-from api.main import app  # noqa: E402
-
-client = TestClient(app)
-
-
-def test_issue_token_and_ws_auth():
+def test_issue_token_and_ws_auth(api_client):
     # Issue token (admin)
-    r = client.post(
+    r = api_client.post(
         "/api/v1/auth/token",
         json={"user_id": "tester", "role": "admin"},
         headers={"X-Admin-Secret": "test-admin-secret"},
@@ -21,7 +9,7 @@ def test_issue_token_and_ws_auth():
     token = r.json()["access_token"]
 
     # Websocket with token
-    with client.websocket_connect(f"/ws?token={token}") as ws:
+    with api_client.websocket_connect(f"/ws?token={token}") as ws:
         ws.send_text("ping")
-        msg = ws.receive_text()
-        assert msg == "pong"
\ No newline at end of file
+        msg = ws.receive()
+        assert (msg.get("text") or (msg.get("bytes") or b"").decode()) == "pong"
\ No newline at end of file
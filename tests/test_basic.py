@@ -1,30 +1,62 @@
+import pytest
+
 from tools.budget_manager import BudgetManager
 from tools.llm_selector import pick_config
 from tools.security import get_secret
 from tools.llm_selector import retry_with_higher_tier
 
 
-def test_budget_manager_needs_downgrade() -> None:
+@pytest.mark.parametrize(
+    "expenses, expected",
+    [
+        ([50], False),
+        ([50, 45], True),
+        ([80], True),  # ровно 80 % лимита
+        ([79.99], False),
+    ],
+)
+def test_budget_manager_needs_downgrade(expenses, expected) -> None:
     manager = BudgetManager(daily_limit=100.0)
-    manager.add_expense(50)
-    assert not manager.needs_downgrade()
-    manager.add_expense(45)
-    assert manager.needs_downgrade()
+    for amount in expenses:
+        manager.add_expense(amount)
+    assert manager.needs_downgrade() is expected
+    assert manager.is_within_safe_margin() is not expected
 
 
 def test_budget_manager_add_usage() -> None:
     manager = BudgetManager(daily_limit=1.0)  # $1 daily limit
     cost = manager.add_usage("gpt-3.5-turbo", prompt_tokens=500, completion_tokens=500)
     # Для gpt-3.5-turbo это 0.25$ + 0.5$ = 0.75$
-    assert round(cost, 3) == 0.75
+    assert cost == 0.75
+    assert manager.spent_micros == 750_000
     assert not manager.needs_downgrade()
 
 
-def test_llm_selector_pick_config() -> None:
-    tier, model = pick_config("cheap", attempt=1)
-    # В конфиге во втором слоте cheap → llama3-8b-instruct
-    assert tier == "cheap"
-    assert model["name"] in {"llama3-8b-instruct", "llama3-8b-instruct"}
+def test_budget_manager_resets_on_new_utc_day() -> None:
+    manager = BudgetManager(daily_limit=100.0, spent_micros=90_000_000)
+    day = manager._day_bucket
+    manager._reset_if_needed((day + 1) * 86400 - 1)
+    assert manager.spent_micros == 90_000_000
+    manager._reset_if_needed((day + 1) * 86400)
+    assert manager.spent_micros == 0
+    assert manager.last_reset.timestamp() == (day + 1) * 86400
+
+
+@pytest.mark.parametrize(
+    "tier, attempt, expected",
+    [
+        ("cheap", 0, "gpt-3.5-turbo"),
+        # В конфиге во втором слоте cheap → llama3-8b-instruct
+        ("cheap", 1, "llama3-8b-instruct"),
+        # Попытки сверх списка моделей возвращают последнюю модель уровня
+        ("cheap", 5, "llama3-8b-instruct"),
+        ("standard", 1, "gemini-pro"),
+    ],
+)
+def test_llm_selector_pick_config(tier, attempt, expected) -> None:
+    got_tier, model = pick_config(tier, attempt=attempt)
+    assert got_tier == tier
+    assert model["name"] == expected
 
 
 def test_retry_with_budget_guard() -> None:
@@ -39,4 +71,60 @@ def test_retry_with_budget_guard() -> None:
 def test_security_get_secret_env(monkeypatch) -> None:
     monkeypatch.setenv("MY_TEST_SECRET", "42")
     assert get_secret("MY_TEST_SECRET") == "42"
-    # cleanup handled by monkeypatch
\ No newline at end of file
+    # cleanup handled by monkeypatch
+
+
+def test_security_get_secret_cache_clear(monkeypatch) -> None:
+    monkeypatch.setenv("MY_ROTATED_SECRET", "old")
+    get_secret.cache_clear()
+    assert get_secret("MY_ROTATED_SECRET") == "old"
+    monkeypatch.setenv("MY_ROTATED_SECRET", "new")
+    # значение закэшировано до явного сброса
+    assert get_secret("MY_ROTATED_SECRET") == "old"
+    get_secret.cache_clear()
+    assert get_secret("MY_ROTATED_SECRET") == "new"
+
+
+def test_security_get_secret_ttl_and_misses(monkeypatch, tmp_path) -> None:
+    from tools import security
+
+    monkeypatch.setattr(security, "_CACHE_TTL", 0.0)
+    monkeypatch.setattr(security.Path, "home", lambda: tmp_path)
+    monkeypatch.delenv("MY_LATE_SECRET", raising=False)
+    get_secret.cache_clear()
+    # отсутствующий ключ не кэшируется
+    assert get_secret("MY_LATE_SECRET") is None
+    monkeypatch.setenv("MY_LATE_SECRET", "v1")
+    assert get_secret("MY_LATE_SECRET") == "v1"
+    # по истечении TTL значение перечитывается
+    monkeypatch.setenv("MY_LATE_SECRET", "v2")
+    assert get_secret("MY_LATE_SECRET") == "v2"
+
+
+def test_logging_config_queue_handler(tmp_path) -> None:
+    import logging
+    import logging.handlers
+    from tools import logging_config
+
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    try:
+        logging_config.setup_logging(log_dir=str(tmp_path), enable_console=False)
+        assert [type(h) for h in root.handlers] == [logging.handlers.QueueHandler]
+        logging.getLogger("test").warning("через очередь")
+        logging_config._stop_listener()
+        assert "через очередь" in (tmp_path / "system.log").read_text(encoding="utf-8")
+    finally:
+        logging_config._stop_listener()
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+
+def test_get_budget_manager_is_shared(monkeypatch) -> None:
+    from tools import budget_manager as bm
+
+    monkeypatch.setattr(bm, "_BUDGET_MANAGER", None)
+    monkeypatch.setenv("MAS_DAILY_BUDGET", "5")
+    manager = bm.get_budget_manager()
+    assert manager is bm.get_budget_manager()
+    assert manager.daily_limit == 5.0
@@ -0,0 +1,140 @@
+import queue
+import time
+from collections import deque
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from tools import budget_storage
+
+
+# заглушка живого потока: фоновый worker не запускается
+_IDLE_WORKER = SimpleNamespace(is_alive=lambda: True)
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    path = tmp_path / "budget.csv"
+    monkeypatch.setattr(budget_storage, "_REDIS", None)
+    monkeypatch.setattr(budget_storage, "_CSV_PATH", path)
+    monkeypatch.setattr(budget_storage, "_fh", None)
+    monkeypatch.setattr(budget_storage, "_buf", deque())
+    monkeypatch.setattr(budget_storage, "_FLUSH_INTERVAL", 3600.0)
+    # без фонового потока: сброс только по числу строк или вручную
+    monkeypatch.setattr(budget_storage, "_worker", _IDLE_WORKER)
+    yield path
+    budget_storage.flush()
+    if budget_storage._fh is not None:
+        budget_storage._fh.close()
+
+
+def test_csv_rows_are_batched(csv_path):
+    date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for _ in range(budget_storage._FLUSH_EVERY - 1):
+        budget_storage.record_expense(date, 0.25)
+    assert not csv_path.exists()
+
+    budget_storage.record_expense(date, 0.25)
+
+    rows = csv_path.read_text().splitlines()
+    assert len(rows) == budget_storage._FLUSH_EVERY
+    assert rows[0] == f"{date.isoformat()},0.250000"
+
+
+def test_flush_writes_pending_rows(csv_path):
+    budget_storage.record_expense(datetime(2024, 1, 2, tzinfo=timezone.utc), 1.5)
+
+    budget_storage.flush()
+
+    assert csv_path.read_text().splitlines() == ["2024-01-02T00:00:00+00:00,1.500000"]
+
+
+class _FakePipeline:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def incrbyfloat(self, key, amount):
+        self.calls.append(("incrbyfloat", key, amount))
+
+    def expire(self, key, ttl):
+        self.calls.append(("expire", key, ttl))
+
+    def execute(self):
+        self.calls.append(("execute",))
+
+
+def test_queued_expenses_use_one_pipeline_per_batch(monkeypatch):
+    calls = []
+    client = SimpleNamespace(pipeline=lambda transaction: _FakePipeline(calls))
+    monkeypatch.setattr(budget_storage, "_REDIS", SimpleNamespace(client=client))
+    # без фонового потока: очередь разбирается синхронно через drain_expenses()
+    monkeypatch.setattr(budget_storage, "_worker", _IDLE_WORKER)
+
+    day = datetime(2024, 1, 3, tzinfo=timezone.utc).timestamp()
+    for amount in (0.5, 0.25):
+        budget_storage.enqueue_expense(day + 60, amount)
+    budget_storage.enqueue_expense(day + 86400, 1.0)
+    budget_storage.drain_expenses()
+
+    assert calls == [
+        ("incrbyfloat", "budget:20240103", 0.75),
+        ("expire", "budget:20240103", 90 * 24 * 3600),
+        ("incrbyfloat", "budget:20240104", 1.0),
+        ("expire", "budget:20240104", 90 * 24 * 3600),
+        ("execute",),
+    ]
+
+
+def test_worker_flushes_after_quiet_interval(csv_path, monkeypatch):
+    monkeypatch.setattr(budget_storage, "_FLUSH_INTERVAL", 0.05)
+    monkeypatch.setattr(budget_storage, "_EXPENSE_Q", queue.SimpleQueue())
+    monkeypatch.setattr(budget_storage, "_worker", None)
+
+    budget_storage.enqueue_expense(datetime(2024, 1, 5, tzinfo=timezone.utc).timestamp(), 2.0)
+    try:
+        deadline = time.monotonic() + 5
+        while not csv_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # одна запись и тишина — строка на диске без flush() и без выхода
+        assert csv_path.read_text().splitlines() == ["2024-01-05T00:00:00+00:00,2.000000"]
+    finally:
+        budget_storage._EXPENSE_Q.put_nowait(None)
+        budget_storage._worker.join(timeout=5)
+
+
+def test_worker_survives_flush_error(csv_path, monkeypatch):
+    monkeypatch.setattr(budget_storage, "_FLUSH_INTERVAL", 0.05)
+    monkeypatch.setattr(budget_storage, "_EXPENSE_Q", queue.SimpleQueue())
+    monkeypatch.setattr(budget_storage, "_worker", None)
+    real_flush = budget_storage._flush_locked
+    failures = []
+
+    def flaky_flush():
+        if not failures:
+            failures.append(1)
+            raise OSError("disk full")
+        real_flush()
+
+    monkeypatch.setattr(budget_storage, "_flush_locked", flaky_flush)
+
+    day = datetime(2024, 1, 6, tzinfo=timezone.utc).timestamp()
+    budget_storage.enqueue_expense(day, 1.0)
+    try:
+        deadline = time.monotonic() + 5
+        while not failures and time.monotonic() < deadline:
+            time.sleep(0.01)
+        worker = budget_storage._worker
+        budget_storage.enqueue_expense(day + 60, 2.0)
+        expected = ["2024-01-06T00:00:00+00:00,1.000000", "2024-01-06T00:01:00+00:00,2.000000"]
+        while time.monotonic() < deadline:
+            if csv_path.exists() and csv_path.read_text().splitlines() == expected:
+                break
+            time.sleep(0.01)
+        # сбой записи не убил поток: оба расхода на диске, worker тот же
+        assert failures
+        assert csv_path.read_text().splitlines() == expected
+        assert budget_storage._worker is worker and worker.is_alive()
+    finally:
+        budget_storage._EXPENSE_Q.put_nowait(None)
+        budget_storage._worker.join(timeout=5)
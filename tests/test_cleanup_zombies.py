@@ -0,0 +1,56 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from tools import cleanup_zombies as cz
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc"), reason="нужен procfs")
+
+
+@pytest.fixture
+def zombie_child():
+    """Завершившийся, но не забранный потомок — зомби текущего процесса."""
+    proc = subprocess.Popen(["true"])
+    for _ in range(100):
+        if proc.pid in {z["pid"] for z in cz._scan_procfs()}:
+            break
+        time.sleep(0.01)
+    yield proc
+    proc.wait()  # ECHILD после reap_children → Popen считает процесс завершённым
+
+
+def test_parse_stat_handles_parens_in_comm():
+    data = b"42 (a) b (c) Z 7 42 42 0 -1 0 0 0 0 0 0 0 0 0 20 0 1 0 12345 0 0\n"
+    assert cz._parse_stat(data) == (42, b"a) b (c", b"Z", 7, 12345)
+
+
+def test_scan_procfs_finds_unreaped_child(zombie_child):
+    zombies = {z["pid"]: z for z in cz._scan_procfs()}
+    zombie = zombies[zombie_child.pid]
+    assert zombie["ppid"] == os.getpid()
+    assert zombie["name"] == "true"
+    with open(f"/proc/{os.getpid()}/comm") as f:
+        assert zombie["parent_name"] == f.read().strip()
+
+
+def test_reap_children_collects_own_zombies(zombie_child):
+    assert zombie_child.pid in cz.reap_children()
+    assert zombie_child.pid not in {z["pid"] for z in cz._scan_procfs()}
+
+
+def test_scan_procfs_skips_malformed_entries(tmp_path):
+    (tmp_path / "stat").write_bytes(b"cpu 0\nbtime 1000\n")
+    for pid, data in {
+        "1": b"1 (init) S 0 1 1 0 -1 0 0 0 0 0 0 0 0 0 20 0 1 0 0 0 0\n",
+        "7": b"7 (dead) Z 1 7 7 0 -1 0 0 0 0 0 0 0 0 0 20 0 1 0 500 0 0\n",
+        "8": b"",  # процесс исчез во время чтения
+        "9": b"9 (cut) Z 1",
+    }.items():
+        (tmp_path / pid).mkdir()
+        (tmp_path / pid / "stat").write_bytes(data)
+
+    zombies = cz._scan_procfs(str(tmp_path))
+    assert [(z["pid"], z["parent_name"]) for z in zombies] == [(7, "init")]
+    assert zombies[0]["create_time"] == 1000 + 500 / os.sysconf("SC_CLK_TCK")
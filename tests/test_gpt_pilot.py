@@ -1,24 +1,12 @@
 from tools import gpt_pilot
 
 
-class DummyResponse:
-    def __init__(self, json_data=None):
-        self._json = json_data or {}
-        self.status_code = 200
-
-    def json(self):
-        return self._json
-
-    def raise_for_status(self):
-        pass
-
-
-def test_create_app_and_status(monkeypatch):
+def test_create_app_and_status(monkeypatch, dummy_response):
     def fake_post(url, json=None, headers=None, timeout=0):
-        return DummyResponse({'id': 'job1'})
+        return dummy_response({'id': 'job1'})
 
     def fake_get(url, headers=None, timeout=0):
-        return DummyResponse({'status': 'done'})
+        return dummy_response({'status': 'done'})
 
     monkeypatch.setattr(gpt_pilot.requests, 'post', fake_post)
     monkeypatch.setattr(gpt_pilot.requests, 'get', fake_get)
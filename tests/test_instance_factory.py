@@ -1,10 +1,8 @@
-from types import SimpleNamespace
 from pathlib import Path
-import yaml
 from tools import instance_factory as ifac
 
 
-def test_deploy_instance_writes_env_and_config(tmp_path, monkeypatch):
+def test_deploy_instance_writes_env_and_config(tmp_path, monkeypatch, load_yaml, fake_subprocess):
     deploy_dir = tmp_path / "deploy" / "internal"
     deploy_dir.mkdir(parents=True)
     (deploy_dir / "compose.yml").write_text("version: '3.8'\n")
@@ -12,22 +10,14 @@ def test_deploy_instance_writes_env_and_config(tmp_path, monkeypatch):
     monkeypatch.setattr(ifac, "REPO_ROOT", tmp_path)
     (tmp_path / "config").mkdir()
 
-    calls = []
-
-    def fake_run(cmd, cwd=None):
-        calls.append((cmd, cwd))
-        return SimpleNamespace(returncode=0)
-
-    monkeypatch.setattr(ifac.subprocess, "run", fake_run)
-
     env = {"TEST": "42", "MAS_ENDPOINT": "http://x"}
     ifac.deploy_instance("deploy/internal", env, "demo", "internal")
 
-    assert (deploy_dir / ".env").read_text() == "TEST=42\nMAS_ENDPOINT=http://x\n"
+    assert (deploy_dir / ".env").read_bytes() == b"TEST=42\nMAS_ENDPOINT=http://x\n"
 
-    cfg = yaml.safe_load((tmp_path / "config" / "instances.yaml").read_text())
+    cfg = load_yaml(tmp_path / "config" / "instances.yaml")
     assert cfg["instances"]["demo"]["endpoint"] == "http://x"
-    assert calls and calls[0][0][:2] == ["docker", "compose"]
+    assert fake_subprocess and fake_subprocess[-1][0][:2] == ["docker", "compose"]
 
 
 def test_auto_deploy_instance(monkeypatch):
@@ -1,15 +1,14 @@
+from types import MappingProxyType
+
 import tools.callback_matrix as cbm
-from agents.core_agents import create_agents
 from tools.smart_groupchat import SmartGroupChatManager
-from config.config_loader import AgentsConfig
 
+# meta can escalate directly
+_ROUTING = MappingProxyType({"communicator": ("meta",), "meta": ()})
 
-def test_goal_groupchat_callback(monkeypatch):
-    """Full-stack integration: Meta -> callback -> outgoing_to_telegram."""
 
-    # Load default agents config
-    cfg = AgentsConfig.from_yaml("config/agents.yaml")
-    agents = create_agents(cfg)
+def test_goal_groupchat_callback(monkeypatch, agents):
+    """Full-stack integration: Meta -> callback -> outgoing_to_telegram."""
 
     # Capture outgoing telegram messages
     sent: list[str] = []
@@ -19,12 +18,7 @@ def test_goal_groupchat_callback(monkeypatch):
 
     monkeypatch.setattr("tools.callbacks.outgoing_to_telegram", fake_sender)
 
-    routing = {
-        "communicator": ["meta"],
-        "meta": [],  # meta can escalate directly
-    }
-
-    manager = SmartGroupChatManager(agents, routing)
+    manager = SmartGroupChatManager(agents, _ROUTING)
 
     # Ask Meta to escalate a question -> should hit callback matrix -> sender
     evt = agents["meta"].escalate("test ping")
@@ -10,7 +10,7 @@ def test_pick_config_downgrades_with_budget(monkeypatch):
         }
     }
     monkeypatch.setattr(ls, "load_tiers", lambda config_path=None: data)
-    manager = BudgetManager(daily_limit=10, spent_today=9)
+    manager = BudgetManager(daily_limit=10, spent_micros=9_000_000)
     tier, model = ls.pick_config("standard", manager=manager)
     assert tier == "cheap"
     assert model["name"] == "c1"
@@ -19,8 +19,32 @@ def test_pick_config_downgrades_with_budget(monkeypatch):
 def test_pick_config_no_downgrade(monkeypatch):
     data = {"tiers": {"cheap": [{"name": "c1"}], "standard": [{"name": "s1"}]}}
     monkeypatch.setattr(ls, "load_tiers", lambda config_path=None: data)
-    manager = BudgetManager(daily_limit=10, spent_today=1)
+    manager = BudgetManager(daily_limit=10, spent_micros=1_000_000)
     tier, model = ls.pick_config("standard", manager=manager)
     assert tier == "standard"
     assert model["name"] == "s1"
 
+
+def test_load_tiers_is_cached_and_pick_returns_copy():
+    assert ls.load_tiers() is ls.load_tiers()
+    _, model = ls.pick_config("cheap")
+    model["name"] = "mutated"
+    _, again = ls.pick_config("cheap")
+    assert again["name"] != "mutated"
+
+
+def test_retry_with_higher_tier_memo_follows_config(monkeypatch):
+    data = {"tiers": {"cheap": [{"name": "c1"}], "standard": [{"name": "s1"}]}}
+    monkeypatch.setattr(ls, "load_tiers", lambda config_path=None: data)
+    tier, model = ls.retry_with_higher_tier("cheap", 0)
+    assert (tier, model["name"]) == ("standard", "s1")
+    model["name"] = "mutated"
+    assert ls.retry_with_higher_tier("cheap", 0)[1]["name"] == "s1"
+
+    # Новый конфиг (правка YAML) сбрасывает мемо
+    data = {"tiers": {"cheap": [{"name": "c1"}], "standard": [{"name": "s2"}]}}
+    assert ls.retry_with_higher_tier("cheap", 0)[1]["name"] == "s2"
+
+    # Бюджет на исходе — другой ключ, повышения нет
+    manager = BudgetManager(daily_limit=10, spent_micros=9_000_000)
+    assert ls.retry_with_higher_tier("cheap", 0, manager)[0] == "cheap"
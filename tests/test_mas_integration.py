@@ -14,13 +14,19 @@ from api.integration import MASAPIIntegration
 class TestSmartGroupChatManager:
     """Tests for SmartGroupChatManager"""
     
-    @pytest.fixture
-    async def manager(self):
-        """Create test manager instance"""
+    @pytest.fixture(scope="class")
+    def manager(self):
+        """Create one initialized manager for the whole class"""
         manager = SmartGroupChatManager()
-        await manager.initialize()
+        # initialize() не держит ссылок на event loop — хватает asyncio.run
+        asyncio.run(manager.initialize())
         return manager
     
+    @pytest.fixture(autouse=True)
+    def _reset(self, manager):
+        """Each test starts from an empty conversation"""
+        manager.conversation_history.clear()
+    
     @pytest.mark.asyncio
     async def test_initialization(self, manager):
         """Test manager initialization"""
@@ -39,7 +45,18 @@ class TestSmartGroupChatManager:
             assert len(manager.conversation_history) == 1
     
     @pytest.mark.asyncio
-    async def test_message_routing(self, manager):
+    async def test_process_user_messages_batch(self, manager):
+        """Test batched processing keeps one response per message in order"""
+        async def fake_route(agent_name, message):
+            return f"re: {message.content}"
+        
+        with patch.object(manager, '_route_message_to_agent', side_effect=fake_route):
+            responses = await manager.process_user_messages(["one", "two", "three"])
+            assert responses == ["re: one", "re: two", "re: three"]
+            assert len(manager.conversation_history) == 3
+    
+    @pytest.mark.asyncio
+    async def test_message_routing(self, manager, monkeypatch):
         """Test message routing between agents"""
         test_message = Message(
             sender="user",
@@ -51,7 +68,7 @@ class TestSmartGroupChatManager:
         # Mock agent
         mock_agent = Mock()
         mock_agent.generate_reply = Mock(return_value="Meta response")
-        manager.agents["meta"] = mock_agent
+        monkeypatch.setitem(manager.agents, "meta", mock_agent)
         
         response = await manager._route_message_to_agent("meta", test_message)
         assert "response" in response.lower() or "meta" in response.lower()
@@ -166,44 +183,48 @@ class TestPerformance:
         manager = SmartGroupChatManager()
         await manager.initialize()
         
-        # Create multiple concurrent tasks
-        tasks = []
-        for i in range(10):
-            task = manager.process_user_message(f"Concurrent message {i}")
-            tasks.append(task)
-        
-        # Wait for all to complete
-        responses = await asyncio.gather(*tasks)
+        # One patch for all tasks: measure dispatch/history, not agent replies
+        with patch.object(manager, '_route_message_to_agent', new=AsyncMock(return_value="r")):
+            responses = await asyncio.gather(
+                *(manager.process_user_message(f"Concurrent message {i}") for i in range(10))
+            )
         
         # Verify all got responses
         assert len(responses) == 10
         assert all(isinstance(r, str) for r in responses)
     
+    @pytest.mark.parametrize("factor", [1, 2, 3])
+    def test_trim_history(self, factor):
+        """History is capped at 2×max_conversation_length, keeping the newest"""
+        manager = SmartGroupChatManager()
+        size = manager.max_conversation_length * factor
+        manager.conversation_history = [
+            Message(sender="user", recipient="communicator", content=f"m{i}", timestamp=datetime.now())
+            for i in range(size)
+        ]
+        manager._trim_history()
+        
+        limit = manager.max_conversation_length * 2
+        assert len(manager.conversation_history) == min(size, limit)
+        assert manager.conversation_history[-1].content == f"m{size - 1}"
+    
     @pytest.mark.asyncio
     async def test_memory_usage(self):
-        """Test memory usage with large conversation history"""
+        """Test memory usage with a short end-to-end conversation"""
         manager = SmartGroupChatManager()
         await manager.initialize()
+        manager.max_conversation_length = 2
         
-        # Process many messages
-        for i in range(100):
-            await manager.process_user_message(f"Message {i}")
+        with patch.object(manager, '_route_message_to_agent', new=AsyncMock(return_value="r")):
+            for i in range(5):
+                await manager.process_user_message(f"Message {i}")
         
         # Check memory constraints
         assert len(manager.conversation_history) <= manager.max_conversation_length * 2
         
         # Verify old messages are cleaned up
         summary = manager.get_conversation_summary()
-        assert summary["total_messages"] <= 100
-
-
-# Fixtures for pytest
-@pytest.fixture
-def event_loop():
-    """Create event loop for async tests"""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+        assert summary["total_messages"] <= 5
 
 
 if __name__ == "__main__":
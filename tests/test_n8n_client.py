@@ -1,36 +1,34 @@
 from types import SimpleNamespace
 
-from tools import n8n_client
+import pytest
 
+from tools import n8n_client
 
-class DummyResponse:
-    def __init__(self, json_data=None):
-        self._json = json_data or {}
-        self.status_code = 200
 
-    def json(self):
-        return self._json
+@pytest.fixture(scope="module")
+def client():
+    return n8n_client.N8NClient('http://host', 'key')
 
-    def raise_for_status(self):
-        pass
 
+@pytest.fixture
+def n8n_calls(monkeypatch, dummy_response):
+    calls = []
 
-def test_create_and_activate_workflow(monkeypatch):
-    called = {}
+    def fake_request(method, url, headers=None, json=None, timeout=0):
+        calls.append({'method': method, 'url': url, 'json': json})
+        return dummy_response({'id': '42'})
 
-    def fake_post(url, headers=None, json=None, timeout=0):
-        called['url'] = url
-        called['json'] = json
-        return DummyResponse({'id': '42'})
+    monkeypatch.setattr(n8n_client, 'get_http_session', lambda: SimpleNamespace(request=fake_request))
+    return calls
 
-    monkeypatch.setattr(n8n_client.requests, 'post', fake_post)
 
-    client = n8n_client.N8NClient('http://host', 'key')
+def test_create_workflow(client, n8n_calls):
     result = client.create_workflow({'name': 'demo'})
     assert result == {'id': '42'}
-    assert called['url'].endswith('/workflows')
+    assert n8n_calls[-1]['url'].endswith('/workflows')
+    assert n8n_calls[-1]['json'] == {'name': 'demo'}
 
-    called.clear()
-    client.activate_workflow('42')
-    assert called['url'].endswith('/workflows/42/activate')
 
+def test_activate_workflow(client, n8n_calls):
+    assert client.activate_workflow('42') is True
+    assert n8n_calls[-1]['url'].endswith('/workflows/42/activate')
@@ -1,5 +1,7 @@
 import types
 
+import pytest
+
 import tools.observability as obs
 
 
@@ -20,3 +22,33 @@ def test_metric_functions():
     obs.record_error('a')
     obs.observe_duration('a', 0.1)
     obs.observe_response_time('a', 0.2)
+
+
+def test_record_batch():
+    prometheus_client = pytest.importorskip("prometheus_client")
+    registry = prometheus_client.REGISTRY
+    labels = {"agent": "batch-test"}
+
+    def sample(name):
+        return registry.get_sample_value(name, labels) or 0.0
+
+    names = (
+        "mas_requests_total",
+        "mas_tokens_total",
+        "mas_errors_total",
+        "mas_task_seconds_count",
+        "mas_response_seconds_sum",
+    )
+    before = {name: sample(name) for name in names}
+
+    obs.record_batch("batch-test", requests=1, tokens=2, errors=1, duration=0.1, rt=0.2)
+    obs.record_batch("batch-test")  # нулевые значения ничего не пишут
+
+    after = {name: sample(name) - before[name] for name in names}
+    assert after == pytest.approx({
+        "mas_requests_total": 1,
+        "mas_tokens_total": 2,
+        "mas_errors_total": 1,
+        "mas_task_seconds_count": 1,
+        "mas_response_seconds_sum": 0.2,
+    })
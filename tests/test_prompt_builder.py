@@ -1,4 +1,3 @@
-import subprocess
 from pathlib import Path
 import pytest
 
@@ -30,13 +29,11 @@ def test_update_global_permission(monkeypatch, tmp_path):
     assert file_path.read_text() == "hi\n"
 
 
-def test_get_prompt_history(monkeypatch, tmp_path):
+def test_get_prompt_history(monkeypatch, tmp_path, fake_subprocess):
     monkeypatch.setattr(pb, "REPO_ROOT", tmp_path)
-    def fake_run(cmd, cwd=None, capture_output=False, text=False):
-        return subprocess.CompletedProcess(cmd, 0, stdout="LOG", stderr="")
-    monkeypatch.setattr(subprocess, "run", fake_run)
     result = pb.get_prompt_history("demo", limit=2)
     assert result == "LOG"
+    assert fake_subprocess[-1][0][0] == "git"
 
 
 def test_update_creates_version(monkeypatch, tmp_path):
@@ -0,0 +1,39 @@
+import time
+
+from memory.in_memory_store import InMemoryStore
+
+
+def test_redis_fallback_set_get(redis_store):
+    redis_store.set("test:redis_fallback:k", "v")
+    assert redis_store.get("test:redis_fallback:k") == "v"
+    assert redis_store.exists("test:redis_fallback:k")
+    redis_store.delete("test:redis_fallback:k")
+    assert redis_store.get("test:redis_fallback:k") is None
+
+
+def test_in_memory_store_expires_lazily(monkeypatch):
+    store = InMemoryStore()
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    store.set("short", "x", ttl=1)
+    store.set("long", "y", ttl=100)
+
+    monkeypatch.setattr(time, "time", lambda: now + 10)
+    assert store.get("short") is None
+    assert not store.exists("short")
+    assert store.get("long") == "y"
+    assert store.keys() == ["long"]
+
+
+def test_in_memory_ttl_treats_unswept_expired_key_as_missing(monkeypatch):
+    store = InMemoryStore()
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    store.set("short", "x", ttl=1)
+    store.set("forever", "y", ttl=0)
+    assert store.ttl("short") == 1
+    assert store.ttl("forever") == -1
+
+    monkeypatch.setattr(time, "time", lambda: now + 10)
+    assert store.ttl("short") == -2
+    assert "short" not in store._data
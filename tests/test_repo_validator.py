@@ -1,13 +1,20 @@
+import pytest
+
 from tools import repo_validator as rv
 
 
-def test_validate_repo_success(tmp_path):
-    repo = tmp_path / "repo"
-    repo.mkdir()
+@pytest.fixture(scope="module")
+def valid_repo(tmp_path_factory):
+    """Read-only scaffold: validate_repository only checks file existence."""
+    repo = tmp_path_factory.mktemp("repo")
     (repo / ".git").mkdir()
     (repo / "README.md").write_text("hi\n")
     (repo / "compose.yml").write_text("version: '3'\n")
-    assert rv.validate_repository(repo)
+    return repo
+
+
+def test_validate_repo_success(valid_repo):
+    assert rv.validate_repository(valid_repo)
 
 
 def test_validate_repo_missing_files(tmp_path):
@@ -1,43 +1,113 @@
-import os
-from fastapi.testclient import TestClient
+def test_chat_alias_and_message(api_client):
+    # chat alias
+    r = api_client.post("/api/v1/chat", json={"message": "ping"})
+    assert r.status_code in (200, 503)
+    # message with visualization
+    r = api_client.post("/api/v1/chat/message", json={"message": "ping"})
+    assert r.status_code in (200, 500)
 
-os.environ["ENVIRONMENT"] = "testing"
-os.environ["MAS_SECRET_KEY"] = "test-secret"
-os.environ["ADMIN_SECRET"] = "test-admin-secret"
 
-from api.main import app  # noqa: E402
+def test_metrics_dashboard(api_client, admin_headers):
+    r = api_client.get("/api/v1/metrics/dashboard", headers=admin_headers)
+    assert r.status_code in (200, 503)
 
-client = TestClient(app)
 
+def test_registry_read(api_client):
+    r = api_client.get("/api/v1/registry/tools")
+    assert r.status_code == 200
 
-def get_admin_headers():
-    resp = client.post("/api/v1/auth/token", json={"user_id": "admin", "role": "admin"}, headers={"X-Admin-Secret": "test-admin-secret"})
-    assert resp.status_code == 200
-    token = resp.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
 
+def test_ws_auth_denied_without_token(api_client):
+    with api_client.websocket_connect("/ws") as ws:
+        # Should close immediately with 1008; TestClient raises
+        pass
 
-def test_chat_alias_and_message():
-    # chat alias
-    r = client.post("/api/v1/chat", json={"message": "ping"})
-    assert r.status_code in (200, 503)
-    # message with visualization
-    r = client.post("/api/v1/chat/message", json={"message": "ping"})
-    assert r.status_code in (200, 500)
+def test_agent_profiles_cached(api_client, monkeypatch):
+    from api.routes_agents import agents_service
+    from api.services import agents as agents_module
 
+    calls = []
+    monkeypatch.setattr(
+        agents_module, "load_config",
+        lambda: calls.append(1) or {"agents": {"meta": {"role": "Meta"}}},
+    )
+    monkeypatch.setattr(agents_service, "config", None)
+    monkeypatch.setattr(agents_service, "_profiles", None)
 
-def test_metrics_dashboard():
-    headers = get_admin_headers()
-    r = client.get("/api/v1/metrics/dashboard", headers=headers)
-    assert r.status_code in (200, 503)
+    first = api_client.get("/api/v1/agents/profiles")
+    second = api_client.get("/api/v1/agents/profiles")
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert [p["id"] for p in first.json()] == ["meta"]
+    # конфиг разобран один раз — второй запрос взял профили из кэша сервиса
+    assert len(calls) == 1
 
 
-def test_registry_read():
-    r = client.get("/api/v1/registry/tools")
+def test_chat_batch_limits(api_client):
+    r = api_client.post("/api/v1/chat/batch", json=[])
+    assert r.status_code == 422
+    r = api_client.post("/api/v1/chat/batch", json=[{"message": "ping"}] * 101)
+    assert r.status_code == 413
+    r = api_client.post("/api/v1/chat/batch", json=[{"message": "ping"}, {"message": "pong"}])
     assert r.status_code == 200
+    assert len(r.json()["results"]) == 2
 
 
-def test_ws_auth_denied_without_token():
-    with client.websocket_connect("/ws") as ws:
-        # Should close immediately with 1008; TestClient raises
-        pass
\ No newline at end of file
+def test_chat_batch_charges_rate_limit_per_message(api_client, monkeypatch):
+    from api import security
+
+    monkeypatch.setattr(security, "RATE_LIMIT_REQUESTS", 3)
+    monkeypatch.setattr(security.rate_limiter, "use_redis", False)
+    monkeypatch.setattr(security.rate_limiter, "memory_store", {}, raising=False)
+    batch = [{"message": "ping"}, {"message": "pong"}]
+    assert api_client.post("/api/v1/chat/batch", json=batch).status_code == 200
+    # 2 + 2 > 3: второй пакет уже не помещается в лимит
+    assert api_client.post("/api/v1/chat/batch", json=batch).status_code == 429
+
+
+class _FakeZSetRedis:
+    """Минимальный sorted set в памяти для RateLimiter.check_rate_limit"""
+
+    def __init__(self):
+        self.zsets = {}
+        self.ops = []
+
+    def pipeline(self):
+        self.ops = []
+        return self
+
+    def zremrangebyscore(self, key, lo, hi):
+        zset = self.zsets.setdefault(key, {})
+        self.ops.append(lambda: [zset.pop(m) for m, s in list(zset.items()) if lo <= s <= hi])
+
+    def zcard(self, key):
+        self.ops.append(lambda: len(self.zsets.get(key, {})))
+
+    def zadd(self, key, mapping):
+        self.ops.append(lambda: self.zsets.setdefault(key, {}).update(mapping))
+
+    def expire(self, key, ttl):
+        self.ops.append(lambda: True)
+
+    def execute(self):
+        return [op() for op in self.ops]
+
+    def zrem(self, key, *members):
+        for m in members:
+            self.zsets.get(key, {}).pop(m, None)
+
+
+def test_redis_rate_limit_rejection_keeps_no_slots(monkeypatch):
+    from api import security
+
+    limiter = security.rate_limiter
+    fake = _FakeZSetRedis()
+    monkeypatch.setattr(limiter, "use_redis", True)
+    monkeypatch.setattr(limiter, "redis_client", fake, raising=False)
+
+    assert limiter.check_rate_limit("k", limit=3, window=60, cost=2)
+    # 2 + 2 > 3: пакет отклонён и не съедает оставшийся слот
+    assert not limiter.check_rate_limit("k", limit=3, window=60, cost=2)
+    assert not limiter.check_rate_limit("k", limit=3, window=60, cost=2)
+    assert len(fake.zsets["k"]) == 2
+    assert limiter.check_rate_limit("k", limit=3, window=60, cost=1)
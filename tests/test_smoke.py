@@ -1,3 +1,6 @@
+import asyncio
+import logging
+
 import pytest
 from pathlib import Path
 
@@ -27,32 +30,112 @@ def test_load_llm_tiers():
     assert isinstance(tiers, dict)
 
 
-def test_create_agents_basic():
-    import sys
-    import types
-
-    dummy = types.ModuleType("prompt_io")
-    dummy.read_prompt = lambda p: ""
-    sys.modules.setdefault("prompt_io", dummy)
-
-    from agents.core_agents import create_agents
-
+def test_create_agents_basic(agents_factory):
     cfg = AgentsConfig(
         agents={
             "meta": AgentDefinition(role="Meta", model="gpt-4"),
             "communicator": AgentDefinition(role="Comm", model="gpt-3"),
         }
     )
-    agents = create_agents(cfg)
+    agents = agents_factory(cfg)
     assert set(agents.keys()) == {"meta", "communicator"}
 
 
-def test_callback_matrix_known_event(capsys):
-    handle_event("OUTGOING_TO_TELEGRAM", "ping")
-    captured = capsys.readouterr()
-    assert "ping" in captured.out
+def test_callback_matrix_known_event(caplog):
+    with caplog.at_level(logging.INFO, logger="tools.callbacks"):
+        handle_event("OUTGOING_TO_TELEGRAM", "ping")
+    assert "[TG] ping" in caplog.messages
 
 
 def test_callback_matrix_unknown_event():
     with pytest.raises(ValueError):
         handle_event("UNKNOWN_EVENT")
+
+
+def test_callback_matrix_dispatch1(monkeypatch):
+    from tools import callback_matrix
+
+    sent = []
+    monkeypatch.setattr("tools.callbacks.outgoing_to_telegram", sent.append)
+    callback_matrix.dispatch1("OUTGOING_TO_TELEGRAM", "ping")
+    assert sent == ["ping"]
+    with pytest.raises(ValueError):
+        callback_matrix.dispatch0("UNKNOWN_EVENT")
+
+
+def test_async_telegram_sender(monkeypatch):
+    from tools import callbacks
+
+    sent = []
+
+    async def sender(msg):
+        sent.append(msg)
+
+    monkeypatch.setattr(callbacks, "_telegram_sender", None)
+    monkeypatch.setattr(callbacks, "_telegram_sender_is_async", False)
+    callbacks.register_telegram_sender(sender)
+
+    async def main():
+        await callbacks.aoutgoing_to_telegram("async")
+        # sync-путь внутри loop ставит отправку фоновой задачей
+        callbacks.outgoing_to_telegram("sync")
+        await asyncio.gather(*callbacks._pending_tasks)
+
+    asyncio.run(main())
+    assert sent == ["async", "sync"]
+
+
+def test_route_instance_creation_registers_version(monkeypatch):
+    from tools import callbacks
+
+    registered = []
+    monkeypatch.setattr(
+        callbacks, "_get_deployers", lambda: (lambda t, env: f"{t}-1", None)
+    )
+    monkeypatch.setattr(
+        callbacks, "register_app_version", lambda name, meta: registered.append((name, meta))
+    )
+    callbacks.route_instance_creation({"type": "client", "env": {"TOKEN": "secret"}})
+    assert registered == [("client-1", {"type": "client", "env_keys": ["TOKEN"]})]
+
+
+def test_telegram_sender_coalesces_messages(monkeypatch):
+    from tools import callbacks
+
+    sent = []
+    monkeypatch.setattr(callbacks, "_telegram_sender", None)
+    monkeypatch.setattr(callbacks, "_telegram_sender_is_async", False)
+    monkeypatch.setattr(callbacks, "_telegram_batcher", None)
+    monkeypatch.setattr(callbacks, "TG_BATCH_INTERVAL", 60)
+    callbacks.register_telegram_sender(sent.append, coalesce=True)
+    try:
+        callbacks.outgoing_to_telegram("a")
+        callbacks.outgoing_to_telegram("b")
+        assert sent == []  # вызов не ждёт отправки
+        callbacks.outgoing_to_telegram("alert", immediate=True)
+        assert sent == ["alert"]  # срочное — мимо очереди
+    finally:
+        callbacks._stop_telegram_batcher()
+    assert sent == ["alert", "a\nb"]
+
+
+def test_pack_messages_respects_limit():
+    from tools.callbacks import _pack_messages
+
+    assert list(_pack_messages(["aa", "bb", "c"], limit=5)) == ["aa\nbb", "c"]
+    assert list(_pack_messages(["toolong", "x"], limit=3)) == ["toolong", "x"]
+
+
+def test_telegram_batcher_stop_does_not_hang():
+    import threading
+
+    from tools.callbacks import _TelegramBatcher
+
+    release = threading.Event()
+    batcher = _TelegramBatcher(lambda text: release.wait(5))
+    batcher.put("stuck")
+    try:
+        batcher.stop(timeout=0.05)  # отправитель висит — stop возвращается по таймауту
+        assert batcher._thread.is_alive()
+    finally:
+        release.set()
@@ -1,6 +1,10 @@
-import json
 from types import SimpleNamespace
 
+try:
+    from orjson import loads
+except ImportError:  # pragma: no cover
+    from json import loads
+
 import tools.studio_logger as sl
 
 
@@ -9,7 +13,7 @@ def test_log_interaction(monkeypatch, tmp_path):
     monkeypatch.setattr(sl, "LOG_PATH", path)
     sl.log_interaction("a", ["b"], {"role": "user", "content": "hi"})
     data = path.read_text().strip()
-    entry = json.loads(data)
+    entry = loads(data)
     assert entry["sender"] == "a"
     assert entry["receivers"] == ["b"]
     assert entry["message"]["content"] == "hi"
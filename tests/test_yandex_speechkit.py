@@ -0,0 +1,22 @@
+import asyncio
+import warnings
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from tools.yandex_speechkit import YandexSpeechKit
+
+
+def test_session_from_finished_loop_is_released():
+    kit = YandexSpeechKit()
+    first = asyncio.run(kit._get_session())
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ResourceWarning)
+        second = asyncio.run(kit._get_session())
+
+    assert second is not first
+    assert first.closed  # закрыта вместе со своим loop, а не отвязана
+    asyncio.run(kit.close())
+    assert kit._session is None
@@ -2,27 +2,52 @@
 A/B Testing System for Prompts
 Система A/B тестирования для оптимизации промптов
 """
-from typing import Dict, Any, List, Optional, Tuple
+from typing import IO, Dict, Any, List, Optional, Sequence, Tuple
 from datetime import datetime, timezone
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, is_dataclass
+import atexit
+import bisect
 import json
+import math
+from collections import deque
+from itertools import accumulate
+import os
 import random
 import hashlib
+import time
+import weakref
+import zlib
 from pathlib import Path
-import statistics
-try:
-    from scipy import stats  # type: ignore
-    _SCIPY_AVAILABLE = True
-except Exception:
-    stats = None  # type: ignore
-    _SCIPY_AVAILABLE = False
 import asyncio
 
 from .quality_metrics import quality_metrics, TaskResult
 from .event_sourcing import event_logger, EventType
 
+try:
+    import orjson  # type: ignore
+
+    def _dumps(obj: Any, indent: bool = False) -> bytes:
+        # dataclass и datetime orjson сериализует сам
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - optional dependency
+    def _json_default(obj: Any) -> Any:
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        if is_dataclass(obj):
+            return asdict(obj)
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def _dumps(obj: Any, indent: bool = False) -> bytes:
+        if indent:
+            return json.dumps(obj, default=_json_default, indent=2).encode()
+        return json.dumps(obj, default=_json_default, separators=(",", ":")).encode()
+
+    _loads = json.loads
 
-@dataclass
+
+@dataclass(slots=True)
 class PromptVariant:
     """Вариант промпта для тестирования"""
     id: str
@@ -31,13 +56,18 @@ class PromptVariant:
     agent_name: str
     task_type: Optional[str] = None
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # md5(content)[:8], считается один раз: содержимое варианта не меняется
+    _hash: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        self._hash = hashlib.md5(self.content.encode()).hexdigest()[:8]
     
     def get_hash(self) -> str:
         """Получить хеш содержимого для версионирования"""
-        return hashlib.md5(self.content.encode()).hexdigest()[:8]
+        return self._hash
 
 
-@dataclass
+@dataclass(slots=True)
 class ExperimentResult:
     """Результат эксперимента"""
     variant_id: str
@@ -47,10 +77,44 @@ class ExperimentResult:
     response_time: float
     token_cost: float
     user_satisfaction: Optional[float] = None  # 1-5 scale
-    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: float = field(default_factory=time.time)  # epoch seconds, UTC
+    
+    @property
+    def timestamp_dt(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp, tz=timezone.utc)
+
+
+@dataclass(slots=True)
+class VariantStats:
+    """Инкрементальные агрегаты по варианту: обновляются за O(1) на результат"""
+    total_count: int = 0
+    success_count: int = 0
+    # Среднее и M2 по Уэлфорду; confidence — только по успешным результатам
+    mean_confidence: float = 0.0
+    m2_confidence: float = 0.0
+    mean_response_time: float = 0.0
+    m2_response_time: float = 0.0
+    sum_cost: float = 0.0
+    sum_satisfaction: float = 0.0
+    satisfaction_count: int = 0
+    
+    def add(self, result: ExperimentResult) -> None:
+        self.total_count += 1
+        if result.success:
+            self.success_count += 1
+            delta = result.confidence - self.mean_confidence
+            self.mean_confidence += delta / self.success_count
+            self.m2_confidence += delta * (result.confidence - self.mean_confidence)
+        delta = result.response_time - self.mean_response_time
+        self.mean_response_time += delta / self.total_count
+        self.m2_response_time += delta * (result.response_time - self.mean_response_time)
+        self.sum_cost += result.token_cost
+        if result.user_satisfaction is not None:
+            self.sum_satisfaction += result.user_satisfaction
+            self.satisfaction_count += 1
 
 
-@dataclass
+@dataclass(slots=True)
 class Experiment:
     """A/B эксперимент"""
     id: str
@@ -65,28 +129,91 @@ class Experiment:
     end_date: Optional[datetime] = None
     min_sample_size: int = 100
     confidence_level: float = 0.95
+    # Метрики, по которым выбирается победитель (см. SIGNIFICANCE_METRICS)
+    significance_metrics: Tuple[str, ...] = ("success_rate",)
+    # CRC32 префикса "<id>:" — затравка для распределения пользователей по вариантам
+    _id_seed: int = field(init=False, repr=False, compare=False)
+    # Накопленные доли traffic_split и id вариантов в том же порядке (для bisect)
+    _cum: Tuple[float, ...] = field(init=False, repr=False, compare=False)
+    _variant_ids: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    # variant_id -> вариант (контрольный и тестовые)
+    _variant_by_id: Dict[str, PromptVariant] = field(init=False, repr=False, compare=False)
     
-    def is_active(self) -> bool:
-        """Проверить активен ли эксперимент"""
-        return self.status == "running" and (
-            self.end_date is None or datetime.now(timezone.utc) < self.end_date
-        )
+    def __post_init__(self) -> None:
+        self._id_seed = zlib.crc32(f"{self.id}:".encode())
+        self._variant_ids = tuple(self.traffic_split)
+        self._cum = tuple(accumulate(self.traffic_split.values()))
+        self._variant_by_id = {self.control_variant.id: self.control_variant}
+        self._variant_by_id.update((v.id, v) for v in self.test_variants)
+    
+    def is_active(self, now: Optional[float] = None) -> bool:
+        """Проверить активен ли эксперимент (now — epoch seconds, по умолчанию time.time())"""
+        if self.status != "running":
+            return False
+        if self.end_date is None:
+            return True
+        return (time.time() if now is None else now) < self.end_date.timestamp()
+
+
+# Сколько результатов на вариант держать в памяти (reservoir sample)
+RESULTS_RESERVOIR_SIZE = 10_000
+
+# Ранний останов (mSPRT): не раньше max(N/10, 10) результатов на вариант
+_EARLY_STOP_MIN_COUNT = 10
+_MSPRT_TAU = 0.1  # ст. отклонение априорной разницы долей успеха
+
+# Метрика -> больше значит лучше
+SIGNIFICANCE_METRICS: Dict[str, bool] = {
+    "success_rate": True,
+    "avg_confidence": True,
+    "avg_response_time": False,
+}
 
 
 class ABTestingManager:
     """Менеджер A/B тестирования"""
     
-    def __init__(self, storage_path: str = None):
+    def __init__(
+        self,
+        storage_path: str = None,
+        use_scipy: bool = False,
+        reservoir_size: int = RESULTS_RESERVOIR_SIZE
+    ):
         if storage_path is None:
-            import os
             base = os.getenv("DATA_PATH", "data")
             storage_path = str(Path(base) / "ab_tests")
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
+        # По умолчанию тесты в замкнутой форме; SciPy импортируется только по запросу
+        self._stats = None
+        if use_scipy:
+            try:
+                from scipy import stats as scipy_stats  # type: ignore
+                self._stats = scipy_stats
+            except ImportError:
+                pass
         
         self.experiments: Dict[str, Experiment] = {}
-        self.results: Dict[str, List[ExperimentResult]] = {}
-        self.variant_cache: Dict[str, PromptVariant] = {}
+        # experiment_id -> variant_id -> выборка результатов варианта (reservoir,
+        # не больше reservoir_size); точные метрики считаются по self.agg
+        self.reservoir_size = reservoir_size
+        self.results: Dict[str, Dict[str, List[ExperimentResult]]] = {}
+        # experiment_id -> variant_id -> агрегаты; анализ не пересчитывает историю
+        self.agg: Dict[str, Dict[str, VariantStats]] = {}
+        # agent_name -> эксперименты агента (в порядке создания/загрузки)
+        self._by_agent: Dict[str, List[Experiment]] = {}
+        # Результаты дописываются построчно в results/<experiment_id>.jsonl
+        self.results_dir = self.storage_path / "results"
+        self.results_dir.mkdir(exist_ok=True)
+        self._results_fp: Dict[str, IO[bytes]] = {}
+        # Что изменилось с последнего сохранения: метаданные и/или буферы результатов
+        self._meta_dirty = False
+        self._results_dirty: set = set()
+        # Файлы закрываются и при сборке менеджера; финализатор держит только словарь
+        weakref.finalize(self, _close_files, self._results_fp)
+        # События для event_logger: копятся здесь, пишет их один drain-таск
+        self._events: deque = deque()
+        self._drain_task: Optional[asyncio.Task] = None
         
         # Load existing experiments
         self.load_experiments()
@@ -99,9 +226,15 @@ class ABTestingManager:
         test_prompts: List[Tuple[str, str]],  # [(name, content)]
         task_type: Optional[str] = None,
         traffic_split: Optional[Dict[str, float]] = None,
-        min_sample_size: int = 100
+        min_sample_size: int = 100,
+        significance_metrics: Optional[Sequence[str]] = None
     ) -> str:
         """Создать новый эксперимент"""
+        if significance_metrics is None:
+            significance_metrics = ("success_rate",)
+        unknown = set(significance_metrics) - SIGNIFICANCE_METRICS.keys()
+        if unknown:
+            raise ValueError(f"Unknown significance metrics: {sorted(unknown)}")
         experiment_id = f"exp_{agent_name}_{int(datetime.now(timezone.utc).timestamp())}"
         
         # Create control variant
@@ -124,7 +257,6 @@ class ABTestingManager:
                 task_type=task_type
             )
             test_variants.append(variant)
-            self.variant_cache[variant.id] = variant
         
         # Set traffic split
         if traffic_split is None:
@@ -144,18 +276,29 @@ class ABTestingManager:
             control_variant=control,
             test_variants=test_variants,
             traffic_split=traffic_split,
-            min_sample_size=min_sample_size
+            min_sample_size=min_sample_size,
+            significance_metrics=tuple(significance_metrics)
         )
         
-        self.experiments[experiment_id] = experiment
-        self.results[experiment_id] = []
-        self.variant_cache[control.id] = control
+        self._add_experiment(experiment)
+        self.results[experiment_id] = {}
+        self.agg[experiment_id] = {}
         
-        # Save
-        self.save_experiments()
+        # Save (только experiments.json; результаты не затрагиваются)
+        self._meta_dirty = True
+        self._save_experiments_meta()
         
         return experiment_id
     
+    def _add_experiment(self, experiment: Experiment) -> None:
+        """Зарегистрировать эксперимент и проиндексировать его по агенту"""
+        previous = self.experiments.get(experiment.id)
+        self.experiments[experiment.id] = experiment
+        bucket = self._by_agent.setdefault(experiment.agent_name, [])
+        if previous is not None and previous in bucket:
+            bucket.remove(previous)
+        bucket.append(experiment)
+    
     def get_variant_for_task(
         self, 
         agent_name: str, 
@@ -163,33 +306,32 @@ class ABTestingManager:
         user_id: Optional[str] = None
     ) -> Optional[PromptVariant]:
         """Получить вариант промпта для задачи"""
-        # Find active experiments for agent
-        active_experiments = [
-            exp for exp in self.experiments.values()
-            if exp.agent_name == agent_name 
-            and exp.is_active()
-            and (exp.task_type is None or exp.task_type == task_type)
-        ]
+        # First active experiment for agent; only this agent's experiments are scanned
+        now = time.time()
+        experiment = next(
+            (
+                exp for exp in self._by_agent.get(agent_name, ())
+                if (exp.task_type is None or exp.task_type == task_type)
+                and exp.is_active(now)
+            ),
+            None,
+        )
         
-        if not active_experiments:
+        if experiment is None:
             return None
         
-        # Use first matching experiment
-        experiment = active_experiments[0]
-        
-        # Deterministic assignment based on user_id
+        # Deterministic assignment based on user_id: не криптографический хеш,
+        # crc32(user_id, seed) == crc32("<experiment.id>:<user_id>")
         if user_id:
-            hash_value = int(hashlib.md5(f"{experiment.id}:{user_id}".encode()).hexdigest(), 16)
-            assignment = hash_value % 100 / 100.0
+            hash_value = zlib.crc32(user_id.encode(), experiment._id_seed)
+            assignment = hash_value % 10_000 / 10_000.0
         else:
             assignment = random.random()
         
-        # Select variant based on traffic split
-        cumulative = 0.0
-        for variant_id, percentage in experiment.traffic_split.items():
-            cumulative += percentage
-            if assignment < cumulative:
-                return self.variant_cache.get(variant_id)
+        # Select variant based on traffic split: первый порог, строго больший assignment
+        idx = bisect.bisect_right(experiment._cum, assignment)
+        if idx < len(experiment._variant_ids):
+            return experiment._variant_by_id.get(experiment._variant_ids[idx])
         
         # Fallback to control
         return experiment.control_variant
@@ -202,6 +344,8 @@ class ABTestingManager:
         user_satisfaction: Optional[float] = None
     ) -> None:
         """Записать результат эксперимента"""
+        # Одно чтение часов на вызов: метка результата и проверка завершения
+        now = time.time()
         result = ExperimentResult(
             variant_id=variant_id,
             task_id=task_result.task_id,
@@ -209,54 +353,133 @@ class ABTestingManager:
             confidence=task_result.confidence,
             response_time=task_result.response_time,
             token_cost=task_result.token_cost,
-            user_satisfaction=user_satisfaction
+            user_satisfaction=user_satisfaction,
+            timestamp=now
         )
         
-        if experiment_id not in self.results:
-            self.results[experiment_id] = []
-        
-        self.results[experiment_id].append(result)
+        self._add_result(experiment_id, result)
+        self._append_result(experiment_id, result)
         
         # Check if experiment should be stopped
-        self._check_experiment_completion(experiment_id)
+        self._check_experiment_completion(experiment_id, now)
         
-        # Save periodically
-        if len(self.results[experiment_id]) % 10 == 0:
+        # Flush periodically (метаданные — только если менялись)
+        if sum(v.total_count for v in self.agg[experiment_id].values()) % 10 == 0:
             self.save_experiments()
     
-    def _check_experiment_completion(self, experiment_id: str) -> None:
+    def _results_file(self, experiment_id: str) -> Path:
+        return self.results_dir / f"{experiment_id}.jsonl"
+    
+    def _append_result(self, experiment_id: str, result: ExperimentResult) -> None:
+        """Дописать один результат в JSONL эксперимента"""
+        fp = self._results_fp.get(experiment_id)
+        if fp is None:
+            fp = self._results_fp[experiment_id] = open(
+                self._results_file(experiment_id), "ab", buffering=1 << 16
+            )
+        fp.write(_dumps(result) + b"\n")
+        self._results_dirty.add(experiment_id)
+    
+    def close(self) -> None:
+        """Сохранить изменённые метаданные, сбросить и закрыть файлы результатов.
+
+        Повторный вызов ничего не делает, пока нет новых изменений.
+        """
+        self._save_experiments_meta()
+        _close_files(self._results_fp)
+        # События, поставленные без запущенного loop, пишем здесь же
+        if self._events and not self._schedule_flush():
+            asyncio.run(self.flush_events())
+    
+    def _add_result(self, experiment_id: str, result: ExperimentResult) -> None:
+        """Учесть результат в агрегатах варианта и в его выборке (Algorithm R)"""
+        variants = self.agg.setdefault(experiment_id, {})
+        stats_ = variants.get(result.variant_id)
+        if stats_ is None:
+            stats_ = variants[result.variant_id] = VariantStats()
+        stats_.add(result)
+        
+        sample = self.results.setdefault(experiment_id, {}).setdefault(result.variant_id, [])
+        if len(sample) < self.reservoir_size:
+            sample.append(result)
+        else:
+            j = random.randrange(stats_.total_count)
+            if j < self.reservoir_size:
+                sample[j] = result
+    
+    def _check_experiment_completion(self, experiment_id: str, now: Optional[float] = None) -> None:
         """Проверить нужно ли завершить эксперимент"""
+        if now is None:
+            now = time.time()
         experiment = self.experiments.get(experiment_id)
-        if not experiment or not experiment.is_active():
+        if not experiment or not experiment.is_active(now):
             return
         
-        results = self.results.get(experiment_id, [])
-        
         # Check minimum sample size
-        variant_counts = {}
-        for result in results:
-            variant_counts[result.variant_id] = variant_counts.get(result.variant_id, 0) + 1
+        variants = self.agg.get(experiment_id, {})
+        min_count = min(v.total_count for v in variants.values()) if variants else 0
+        
+        if min_count < experiment.min_sample_size and not self._early_stop(experiment, min_count):
+            return
         
-        min_count = min(variant_counts.values()) if variant_counts else 0
+        # Perform statistical analysis (при раннем останове — подтверждение)
+        analysis = self.analyze_experiment(experiment_id)
         
-        if min_count >= experiment.min_sample_size:
-            # Perform statistical analysis
-            analysis = self.analyze_experiment(experiment_id)
+        # Check if we have statistical significance
+        if analysis.get("has_winner"):
+            experiment.status = "completed"
+            experiment.end_date = datetime.fromtimestamp(now, tz=timezone.utc)
+            self._meta_dirty = True
+            # Статус сохраняем сразу: после рестарта эксперимент не должен ожить
+            self._save_experiments_meta()
             
-            # Check if we have statistical significance
-            if analysis.get("has_winner"):
-                experiment.status = "completed"
-                experiment.end_date = datetime.now(timezone.utc)
-                
-                # Log completion
-                asyncio.create_task(event_logger.log_system_event(
-                    EventType.PROMPT_UPDATED,
-                    {
-                        "experiment_id": experiment_id,
-                        "winner": analysis.get("winner"),
-                        "improvement": analysis.get("improvement")
-                    }
-                ))
+            # Log completion
+            self._emit_event(
+                EventType.PROMPT_UPDATED,
+                {
+                    "experiment_id": experiment_id,
+                    "winner": analysis.get("winner"),
+                    "improvement": analysis.get("improvement")
+                }
+            )
+    
+    def _early_stop(self, experiment: Experiment, min_count: int) -> bool:
+        """mSPRT по доле успехов: разница уже настолько велика, что N можно не добирать"""
+        if min_count < max(_EARLY_STOP_MIN_COUNT, experiment.min_sample_size // 10):
+            return False
+        variants = self.agg[experiment.id]
+        control = variants.get(experiment.control_variant.id)
+        if control is None:
+            return False
+        threshold = 1 / (1 - experiment.confidence_level)
+        for variant in experiment.test_variants:
+            test = variants.get(variant.id)
+            if test is not None and _msprt_lr(
+                control.success_count, control.total_count, test.success_count, test.total_count
+            ) >= threshold:
+                return True
+        return False
+    
+    def _emit_event(self, event_type: EventType, details: Dict[str, Any]) -> None:
+        """Поставить событие в очередь; без запущенного loop его запишет close()"""
+        self._events.append((event_type, details))
+        self._schedule_flush()
+    
+    def _schedule_flush(self) -> bool:
+        """Запустить drain-таск в текущем loop; False, если loop не запущен"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = loop.create_task(self.flush_events())
+        return True
+    
+    async def flush_events(self) -> None:
+        """Записать накопленные события в event_logger"""
+        while self._events:
+            event_type, details = self._events.popleft()
+            await event_logger.log_system_event(event_type, details)
     
     def analyze_experiment(self, experiment_id: str) -> Dict[str, Any]:
         """Анализировать результаты эксперимента"""
@@ -264,22 +487,15 @@ class ABTestingManager:
         if not experiment:
             return {"error": "Experiment not found"}
         
-        results = self.results.get(experiment_id, [])
-        if not results:
+        variants = self.agg.get(experiment_id)
+        if not variants:
             return {"error": "No results yet"}
         
-        # Group results by variant
-        variant_results = {}
-        for result in results:
-            if result.variant_id not in variant_results:
-                variant_results[result.variant_id] = []
-            variant_results[result.variant_id].append(result)
-        
         # Calculate metrics for each variant
-        variant_metrics = {}
-        for variant_id, variant_results_list in variant_results.items():
-            metrics = self._calculate_variant_metrics(variant_results_list)
-            variant_metrics[variant_id] = metrics
+        variant_metrics = {
+            variant_id: self._calculate_variant_metrics(stats_)
+            for variant_id, stats_ in variants.items()
+        }
         
         # Perform statistical tests
         control_id = experiment.control_variant.id
@@ -288,40 +504,31 @@ class ABTestingManager:
         best_variant = control_id
         best_improvement = 0.0
         has_winner = False
+        alpha = 1 - experiment.confidence_level
+        control_stats = variants.get(control_id)
+        p_values: Dict[str, Dict[str, float]] = {}
         
         for variant in experiment.test_variants:
-            test_metrics = variant_metrics.get(variant.id, {})
+            test_stats = variants.get(variant.id)
+            if control_stats is None or test_stats is None:
+                continue
+            test_metrics = variant_metrics[variant.id]
             
-            # Compare success rates
-            if "success_rate" in control_metrics and "success_rate" in test_metrics:
-                # Chi-square test for success rates
-                control_successes = control_metrics["success_count"]
-                control_total = control_metrics["total_count"]
-                test_successes = test_metrics["success_count"]
-                test_total = test_metrics["total_count"]
+            variant_p = p_values[variant.id] = {}
+            for metric in experiment.significance_metrics:
+                p_value = self._metric_p_value(metric, control_stats, test_stats)
+                variant_p[metric] = p_value
+                if p_value >= alpha:
+                    continue
                 
-                # Perform chi-square test
-                observed = [[control_successes, control_total - control_successes],
-                           [test_successes, test_total - test_successes]]
-                
-                try:
-                    if _SCIPY_AVAILABLE and stats is not None:
-                        chi2, p_value = stats.chi2_contingency(observed)[:2]
-                        significant = p_value < (1 - experiment.confidence_level)
-                    else:
-                        # Fallback: simple heuristic significance when sample sizes are large and delta is notable
-                        total = control_total + test_total
-                        delta = abs(test_metrics["success_rate"] - control_metrics["success_rate"]) if total > 0 else 0
-                        significant = (total >= max(50, experiment.min_sample_size)) and (delta >= 0.1)
-
-                    if significant:
-                        improvement = (test_metrics["success_rate"] - control_metrics["success_rate"]) / max(control_metrics["success_rate"], 1e-9)
-                        if improvement > best_improvement:
-                            best_improvement = improvement
-                            best_variant = variant.id
-                            has_winner = True
-                except Exception:
-                    pass  # Not enough data or computation unavailable
+                control_value = control_metrics[metric]
+                improvement = (test_metrics[metric] - control_value) / max(abs(control_value), 1e-9)
+                if not SIGNIFICANCE_METRICS[metric]:
+                    improvement = -improvement  # меньше — лучше
+                if improvement > best_improvement:
+                    best_improvement = improvement
+                    best_variant = variant.id
+                    has_winner = True
         
         return {
             "experiment_id": experiment_id,
@@ -331,37 +538,63 @@ class ABTestingManager:
             "has_winner": has_winner,
             "winner": best_variant if has_winner else None,
             "improvement": best_improvement if has_winner else 0.0,
+            "p_values": p_values,
             "sample_sizes": {
-                vid: len(vresults) 
-                for vid, vresults in variant_results.items()
+                vid: stats_.total_count
+                for vid, stats_ in variants.items()
             }
         }
     
-    def _calculate_variant_metrics(self, results: List[ExperimentResult]) -> Dict[str, Any]:
-        """Рассчитать метрики для варианта"""
-        if not results:
+    def _metric_p_value(self, metric: str, control: VariantStats, test: VariantStats) -> float:
+        """p-value различия метрики между контролем и тестовым вариантом"""
+        if metric == "success_rate":
+            if self._stats is not None:
+                observed = [[control.success_count, control.total_count - control.success_count],
+                           [test.success_count, test.total_count - test.success_count]]
+                try:
+                    return float(self._stats.chi2_contingency(observed)[1])
+                except ValueError:
+                    return 1.0  # нулевой столбец: различий нет
+            return _two_prop_p(control.success_count, control.total_count, test.success_count, test.total_count)
+        
+        if metric == "avg_confidence":
+            samples = [
+                (s.success_count, s.mean_confidence, s.m2_confidence) for s in (control, test)
+            ]
+        else:
+            samples = [
+                (s.total_count, s.mean_response_time, s.m2_response_time) for s in (control, test)
+            ]
+        (n1, mean1, sq1), (n2, mean2, sq2) = samples
+        if n1 < 2 or n2 < 2:
+            return 1.0
+        t_df = _welch_t(mean1, sq1 / (n1 - 1), n1, mean2, sq2 / (n2 - 1), n2)
+        if t_df is None:
+            return 1.0
+        t, df = t_df
+        if self._stats is not None:
+            return float(2 * self._stats.t.sf(abs(t), df))
+        return _t_two_sided_p(t, df)
+    
+    def _calculate_variant_metrics(self, stats_: VariantStats) -> Dict[str, Any]:
+        """Рассчитать метрики для варианта из накопленных агрегатов"""
+        total_count = stats_.total_count
+        if not total_count:
             return {}
         
-        success_count = sum(1 for r in results if r.success)
-        total_count = len(results)
-        
-        confidences = [r.confidence for r in results if r.success]
-        response_times = [r.response_time for r in results]
-        costs = [r.token_cost for r in results]
-        satisfactions = [r.user_satisfaction for r in results if r.user_satisfaction is not None]
-        
+        success_count = stats_.success_count
         metrics = {
             "total_count": total_count,
             "success_count": success_count,
             "success_rate": success_count / total_count,
-            "avg_confidence": statistics.mean(confidences) if confidences else 0,
-            "avg_response_time": statistics.mean(response_times),
-            "avg_cost": statistics.mean(costs),
-            "cost_per_success": sum(costs) / max(success_count, 1)
+            "avg_confidence": stats_.mean_confidence if success_count else 0,
+            "avg_response_time": stats_.mean_response_time,
+            "avg_cost": stats_.sum_cost / total_count,
+            "cost_per_success": stats_.sum_cost / max(success_count, 1)
         }
         
-        if satisfactions:
-            metrics["avg_satisfaction"] = statistics.mean(satisfactions)
+        if stats_.satisfaction_count:
+            metrics["avg_satisfaction"] = stats_.sum_satisfaction / stats_.satisfaction_count
         
         return metrics
     
@@ -369,9 +602,8 @@ class ABTestingManager:
         """Получить победивший промпт для агента"""
         # Find completed experiments
         completed = [
-            exp for exp in self.experiments.values()
-            if exp.agent_name == agent_name 
-            and exp.status == "completed"
+            exp for exp in self._by_agent.get(agent_name, ())
+            if exp.status == "completed"
             and (exp.task_type is None or exp.task_type == task_type)
         ]
         
@@ -386,15 +618,21 @@ class ABTestingManager:
         
         if analysis.get("has_winner"):
             winner_id = analysis.get("winner")
-            winner_variant = self.variant_cache.get(winner_id)
+            winner_variant = latest._variant_by_id.get(winner_id)
             if winner_variant:
                 return winner_variant.content
         
         return None
     
     def save_experiments(self) -> None:
-        """Сохранить эксперименты на диск"""
-        # Save experiments
+        """Сохранить на диск то, что изменилось"""
+        self._save_experiments_meta()
+        self._save_results()
+    
+    def _save_experiments_meta(self) -> None:
+        """Переписать experiments.json, если метаданные менялись"""
+        if not self._meta_dirty:
+            return
         experiments_file = self.storage_path / "experiments.json"
         experiments_data = {}
         
@@ -419,44 +657,32 @@ class ABTestingManager:
                 ],
                 "traffic_split": experiment.traffic_split,
                 "status": experiment.status,
-                "start_date": experiment.start_date.isoformat(),
-                "end_date": experiment.end_date.isoformat() if experiment.end_date else None,
+                "start_date": experiment.start_date.timestamp(),
+                "end_date": experiment.end_date.timestamp() if experiment.end_date else None,
                 "min_sample_size": experiment.min_sample_size,
-                "confidence_level": experiment.confidence_level
+                "confidence_level": experiment.confidence_level,
+                "significance_metrics": list(experiment.significance_metrics)
             }
         
-        with open(experiments_file, "w") as f:
-            json.dump(experiments_data, f, indent=2)
-        
-        # Save results
-        results_file = self.storage_path / "results.json"
-        results_data = {}
-        
-        for exp_id, results in self.results.items():
-            results_data[exp_id] = [
-                {
-                    "variant_id": r.variant_id,
-                    "task_id": r.task_id,
-                    "success": r.success,
-                    "confidence": r.confidence,
-                    "response_time": r.response_time,
-                    "token_cost": r.token_cost,
-                    "user_satisfaction": r.user_satisfaction,
-                    "timestamp": r.timestamp.isoformat()
-                }
-                for r in results
-            ]
-        
-        with open(results_file, "w") as f:
-            json.dump(results_data, f, indent=2)
+        _atomic_write(experiments_file, _dumps(experiments_data, indent=True))
+        self._meta_dirty = False
+    
+    def _save_results(self) -> None:
+        """Сбросить буферы JSONL экспериментов, в которые дописывались результаты"""
+        # Results are appended to JSONL as they arrive; only flush buffers here
+        for exp_id in self._results_dirty:
+            fp = self._results_fp.get(exp_id)
+            if fp is not None:
+                fp.flush()
+        self._results_dirty.clear()
     
     def load_experiments(self) -> None:
         """Загрузить эксперименты с диска"""
         # Load experiments
         experiments_file = self.storage_path / "experiments.json"
         if experiments_file.exists():
-            with open(experiments_file, "r") as f:
-                experiments_data = json.load(f)
+            with open(experiments_file, "rb") as f:
+                experiments_data = _loads(f.read())
             
             for exp_id, data in experiments_data.items():
                 # Recreate variants
@@ -478,7 +704,6 @@ class ABTestingManager:
                         task_type=data.get("task_type")
                     )
                     test_variants.append(variant)
-                    self.variant_cache[variant.id] = variant
                 
                 # Create experiment
                 experiment = Experiment(
@@ -490,36 +715,167 @@ class ABTestingManager:
                     test_variants=test_variants,
                     traffic_split=data["traffic_split"],
                     status=data["status"],
-                    start_date=datetime.fromisoformat(data["start_date"]),
-                    end_date=datetime.fromisoformat(data["end_date"]) if data["end_date"] else None,
+                    start_date=_to_datetime(data["start_date"]),
+                    end_date=_to_datetime(data["end_date"]) if data["end_date"] else None,
                     min_sample_size=data.get("min_sample_size", 100),
-                    confidence_level=data.get("confidence_level", 0.95)
+                    confidence_level=data.get("confidence_level", 0.95),
+                    significance_metrics=tuple(data.get("significance_metrics", ("success_rate",)))
                 )
                 
-                self.experiments[exp_id] = experiment
-                self.variant_cache[control.id] = control
+                self._add_experiment(experiment)
+        
+        # Legacy single-file results.json -> per-experiment JSONL (one-time migration)
+        legacy_file = self.storage_path / "results.json"
+        if legacy_file.exists():
+            with open(legacy_file, "rb") as f:
+                legacy_data = _loads(f.read())
+            for exp_id, rows in legacy_data.items():
+                path = self._results_file(exp_id)
+                if rows and not path.exists():
+                    with open(path, "wb") as out:
+                        out.writelines(_dumps(row) + b"\n" for row in rows)
+            legacy_file.replace(legacy_file.with_suffix(".json.migrated"))
         
         # Load results
-        results_file = self.storage_path / "results.json"
-        if results_file.exists():
-            with open(results_file, "r") as f:
-                results_data = json.load(f)
-            
-            for exp_id, results_list in results_data.items():
-                self.results[exp_id] = []
-                for r_data in results_list:
-                    result = ExperimentResult(
-                        variant_id=r_data["variant_id"],
-                        task_id=r_data["task_id"],
-                        success=r_data["success"],
-                        confidence=r_data["confidence"],
-                        response_time=r_data["response_time"],
-                        token_cost=r_data["token_cost"],
-                        user_satisfaction=r_data.get("user_satisfaction"),
-                        timestamp=datetime.fromisoformat(r_data["timestamp"])
-                    )
-                    self.results[exp_id].append(result)
+        for path in self.results_dir.glob("*.jsonl"):
+            exp_id = path.stem
+            self.results[exp_id] = {}
+            self.agg[exp_id] = {}
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    self._add_result(exp_id, _row_to_result(_loads(line)))
+
+
+def _two_prop_p(s1: int, n1: int, s2: int, n2: int) -> float:
+    """Двусторонний p-value z-теста для двух долей (s1/n1 против s2/n2)"""
+    p = (s1 + s2) / (n1 + n2)
+    se = math.sqrt(p * (1 - p) * (1 / n1 + 1 / n2))
+    if se == 0:
+        return 1.0  # все успехи или все неудачи в обеих группах
+    z = (s1 / n1 - s2 / n2) / se
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def _msprt_lr(s1: int, n1: int, s2: int, n2: int, tau: float = _MSPRT_TAU) -> float:
+    """Отношение правдоподобия mSPRT для разницы долей с априорным N(0, tau^2).
+
+    Оценка разницы считается нормальной с дисперсией se^2; всегда-валидный
+    тест отвергает равенство долей, когда значение >= 1/alpha.
+    """
+    p1, p2 = s1 / n1, s2 / n2
+    se2 = p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2
+    if se2 == 0:
+        return 1.0
+    tau2 = tau * tau
+    delta = p2 - p1
+    return math.sqrt(se2 / (se2 + tau2)) * math.exp(
+        delta * delta * tau2 / (2 * se2 * (se2 + tau2))
+    )
+
+
+def _welch_t(
+    m1: float, v1: float, n1: int, m2: float, v2: float, n2: int
+) -> Optional[Tuple[float, float]]:
+    """t-статистика Уэлча и степени свободы Саттертуэйта; None при нулевых дисперсиях"""
+    a, b = v1 / n1, v2 / n2
+    se2 = a + b
+    if se2 == 0:
+        return None
+    t = (m1 - m2) / math.sqrt(se2)
+    df = se2 * se2 / (a * a / (n1 - 1) + b * b / (n2 - 1))
+    return t, df
+
+
+def _t_two_sided_p(t: float, df: float) -> float:
+    """Двусторонний p-value t-распределения: I_{df/(df+t^2)}(df/2, 1/2)"""
+    return _betainc(df / 2, 0.5, df / (df + t * t))
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Регуляризованная неполная бета-функция I_x(a, b)"""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+        + a * math.log(x) + b * math.log1p(-x)
+    )
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1 - x) / b
+
+
+def _betacf(a: float, b: float, x: float, max_iter: int = 200, eps: float = 1e-12) -> float:
+    """Цепная дробь для _betainc (метод Ленца)"""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1, a - 1
+    c = 1.0
+    d = 1 - qab * x / qap
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        for aa in (
+            m * (b - m) * x / ((qam + m2) * (a + m2)),
+            -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2)),
+        ):
+            d = 1 + aa * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + aa / c
+            if abs(c) < tiny:
+                c = tiny
+            h *= d * c
+        if abs(d * c - 1) < eps:
+            break
+    return h
+
+
+def _close_files(files: Dict[str, IO[bytes]]) -> None:
+    """Закрыть и забыть открытые файлы результатов"""
+    for fp in files.values():
+        fp.close()
+    files.clear()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Записать файл целиком через временный файл и os.replace.
+
+    Сбой посреди записи оставляет прежнюю версию файла нетронутой.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb", buffering=1 << 20) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _to_datetime(value: Any) -> datetime:
+    """Дата с диска: epoch-секунды или ISO-строка (старый формат)"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+def _row_to_result(r_data: Dict[str, Any]) -> ExperimentResult:
+    ts = r_data["timestamp"]
+    if isinstance(ts, str):  # старый формат: ISO-строка
+        ts = datetime.fromisoformat(ts).timestamp()
+    return ExperimentResult(
+        variant_id=r_data["variant_id"],
+        task_id=r_data["task_id"],
+        success=r_data["success"],
+        confidence=r_data["confidence"],
+        response_time=r_data["response_time"],
+        token_cost=r_data["token_cost"],
+        user_satisfaction=r_data.get("user_satisfaction"),
+        timestamp=ts
+    )
 
 
 # Global A/B testing manager
-ab_testing = ABTestingManager()
\ No newline at end of file
+ab_testing = ABTestingManager()
+atexit.register(ab_testing.close)
\ No newline at end of file
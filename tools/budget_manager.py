@@ -9,26 +9,52 @@ budget_manager.py
 основываться на фактической стоимости запросов.
 """
 
+import os
+import threading
+import time
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
-from typing import Dict
+from datetime import datetime, timezone
+from typing import Dict, Optional
 
-# cost estimation
-from .pricing import estimate_cost
-from .budget_storage import record_expense
+# Стоимость запросов считает .pricing. Денежные суммы храним в целых
+# микродолларах (1e-6 USD): сложение целых не накапливает ошибку округления,
+# а сравнение с лимитом точное.
+from .pricing import MICROS_PER_USD, estimate_cost_micros, usd_to_micros
+from .budget_storage import enqueue_expense
+
+_SECONDS_PER_DAY = 86400
 
 
 @dataclass
 class BudgetManager:
     daily_limit: float  # дневной лимит стоимости (например, в долларах)
-    spent_today: float = 0.0
+    spent_micros: int = 0  # потрачено сегодня, в микродолларах
     last_reset: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    limit_micros: int = field(init=False, repr=False)
+    # номер текущих UTC-суток (epoch // 86400): сброс — сравнение целых
+    _day_bucket: int = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.limit_micros = usd_to_micros(self.daily_limit)
+        self._day_bucket = int(self.last_reset.timestamp() // _SECONDS_PER_DAY)
+
+    @property
+    def spent_today(self) -> float:
+        """Потрачено сегодня, в USD."""
+        return self.spent_micros / MICROS_PER_USD
 
     def add_expense(self, amount: float) -> None:
         """Добавить расход к сегодняшнему счёту."""
-        self._reset_if_needed()
-        self.spent_today += amount
-        record_expense(datetime.now(timezone.utc), amount)
+        now = time.time()
+        self._reset_if_needed(now)
+        self.spent_micros += usd_to_micros(amount)
+        enqueue_expense(now, amount)
+
+    def _add_expense_micros(self, micros: int) -> None:
+        now = time.time()
+        self._reset_if_needed(now)
+        self.spent_micros += micros
+        enqueue_expense(now, micros / MICROS_PER_USD)
 
     # ------------------------------------------------------------------
     # High-level helper
@@ -37,20 +63,58 @@ class BudgetManager:
     def add_usage(self, model: str, prompt_tokens: int, completion_tokens: int = 0) -> float:
         """Учитыть использование токенов и вернуть рассчитанную стоимость.
 
-        Это обёртка над :func:`estimate_cost`.  Возвращённое значение (USD)
-        автоматически добавляется к ежедневному счётчику.
+        Стоимость считается в целых микродолларах по предвычисленной
+        таблице цен (:func:`estimate_cost_micros`).  Возвращённое значение
+        (USD) автоматически добавляется к ежедневному счётчику.
         """
 
-        cost = estimate_cost(model, prompt_tokens, completion_tokens)
-        self.add_expense(cost)
-        return cost
+        micros = estimate_cost_micros(model, prompt_tokens, completion_tokens)
+        self._add_expense_micros(micros)
+        return micros / MICROS_PER_USD
+
+    def _reset_if_needed(self, now: Optional[float] = None) -> None:
+        """Обнулить счётчик при смене UTC-суток."""
+        if now is None:
+            now = time.time()
+        bucket = int(now // _SECONDS_PER_DAY)
+        if bucket != self._day_bucket:
+            self.spent_micros = 0
+            self._day_bucket = bucket
+            self.last_reset = datetime.fromtimestamp(now, timezone.utc)
 
-    def _reset_if_needed(self) -> None:
-        if datetime.now(timezone.utc) - self.last_reset >= timedelta(days=1):
-            self.spent_today = 0.0
-            self.last_reset = datetime.now(timezone.utc)
+    def is_within_safe_margin(self) -> bool:
+        """Быстрая проверка: расход ниже 80 % лимита, без сброса суток.
+
+        Смена суток расход только уменьшает, поэтому ``True`` верен и без
+        :meth:`_reset_if_needed`; ``False`` перепроверяет :meth:`needs_downgrade`.
+        """
+        return self.spent_micros * 5 < self.limit_micros * 4
 
     def needs_downgrade(self) -> bool:
-        """Проверить, достигнут ли порог 80 % от дневного лимита."""
+        """Проверить, достигнут ли порог 80 % от дневного лимита."""
         self._reset_if_needed()
-        return self.spent_today >= 0.8 * self.daily_limit
+        # spent >= 0.8 * limit в целых числах
+        return self.spent_micros * 5 >= self.limit_micros * 4
+
+
+# Один BudgetManager на процесс: иначе каждый импортёр считает свой
+# расход и эффективный дневной лимит умножается.
+_BUDGET_MANAGER: Optional[BudgetManager] = None
+_BUDGET_MANAGER_LOCK = threading.Lock()
+
+
+def get_budget_manager() -> BudgetManager:
+    """Общий для процесса BudgetManager, создаётся при первом обращении.
+
+    Лимит берётся из ``MAS_DAILY_BUDGET`` (USD, по умолчанию 100).
+    """
+    global _BUDGET_MANAGER
+    manager = _BUDGET_MANAGER
+    if manager is None:
+        with _BUDGET_MANAGER_LOCK:
+            if _BUDGET_MANAGER is None:
+                _BUDGET_MANAGER = BudgetManager(
+                    daily_limit=float(os.environ.get("MAS_DAILY_BUDGET", 100.0))
+                )
+            manager = _BUDGET_MANAGER
+    return manager
@@ -10,10 +10,17 @@ per-request logs.
 
 from __future__ import annotations
 
+import atexit
 import csv
-from datetime import datetime
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import IO, Deque, Dict, List, Optional, Tuple
 
 from memory.redis_store import RedisStore
 
@@ -30,6 +37,23 @@ except Exception:  # pragma: no cover – redis not installed or connection erro
 _CSV_PATH = Path("data") / "budget.csv"
 _CSV_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# CSV rows are buffered and written in batches through one long-lived handle:
+# every _FLUSH_EVERY rows, after _FLUSH_INTERVAL seconds (checked on write and
+# by the background worker when idle), or at exit.
+_FLUSH_EVERY = 64
+_FLUSH_INTERVAL = 1.0  # seconds
+
+_buf: Deque[Tuple[str, str]] = deque()
+_buf_lock = threading.Lock()
+_last_flush = time.monotonic()
+_fh: Optional[IO[str]] = None
+
+# Expenses queued by enqueue_expense(); a daemon thread writes them in batches
+_BATCH_MAX = 256
+_EXPENSE_Q: "queue.SimpleQueue[Optional[Tuple[float, float]]]" = queue.SimpleQueue()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
 
 # ---------------------------------------------------------------------------
 # Public API
@@ -42,17 +66,145 @@ def _key_for(date: datetime) -> str:
 def record_expense(date: datetime, amount: float) -> None:
     """Add *amount* (USD) to the aggregated value for the given date."""
 
-    if _REDIS is not None:
-        key = _key_for(date)
+    if _REDIS is not None and _redis_add({_key_for(date): amount}):
+        return
+    _csv_append(date.isoformat(), amount)
+
+
+def record_expense_ts(ts: float, amount: float) -> None:
+    """Like :func:`record_expense`, for a UTC epoch timestamp.
+
+    The timestamp is formatted only for the backend that actually stores it.
+    """
+
+    if _REDIS is not None and _redis_add({time.strftime("budget:%Y%m%d", time.gmtime(ts)): amount}):
+        return
+    _csv_append(datetime.fromtimestamp(ts, timezone.utc).isoformat(), amount)
+
+
+def enqueue_expense(ts: float, amount: float) -> None:
+    """Queue an expense without blocking; a background thread stores it.
+
+    Queued expenses are written in batches: one Redis pipeline per batch
+    with a single increment per day, or buffered CSV rows as fallback.
+    """
+
+    _EXPENSE_Q.put_nowait((ts, amount))
+    if _worker is None or not _worker.is_alive():
+        _start_worker()
+
+
+def drain_expenses() -> None:
+    """Synchronously store everything currently queued."""
+
+    batch = _take_batch([])
+    if batch:
+        _write_batch(batch)
+
+
+def _start_worker() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_worker_loop, name="budget-storage", daemon=True)
+            _worker.start()
+
+
+def _worker_loop() -> None:
+    while True:
         try:
-            _REDIS.client.incrbyfloat(key, amount)
-            # set TTL = 90 days to prevent unbounded growth
-            _REDIS.client.expire(key, 90 * 24 * 3600)
+            item = _EXPENSE_Q.get(timeout=_FLUSH_INTERVAL)
+        except queue.Empty:
+            # тишина дольше _FLUSH_INTERVAL: буфер CSV уходит на диск по таймеру
+            try:
+                flush()
+            except Exception:  # disk errors must not kill the worker
+                logging.exception("[budget_storage] failed to flush buffered rows")
+            continue
+        if item is None:  # shutdown sentinel
+            drain_expenses()
             return
-        except Exception:  # pragma: no cover – network errors
-            pass  # fallback to CSV
+        batch = _take_batch([item])
+        stop = None in batch
+        try:
+            _write_batch([e for e in batch if e is not None])
+        except Exception:  # pragma: no cover – disk errors must not kill the worker
+            logging.exception("[budget_storage] failed to store %d expenses", len(batch))
+        if stop:
+            return
+
+
+def _take_batch(batch: List[Optional[Tuple[float, float]]]) -> List[Optional[Tuple[float, float]]]:
+    while len(batch) < _BATCH_MAX:
+        try:
+            batch.append(_EXPENSE_Q.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _write_batch(batch: List[Tuple[float, float]]) -> None:
+    totals: Dict[str, float] = {}
+    for ts, amount in batch:
+        key = time.strftime("budget:%Y%m%d", time.gmtime(ts))
+        totals[key] = totals.get(key, 0.0) + amount
+    if _REDIS is not None and _redis_add(totals):
+        return
+    for ts, amount in batch:
+        _csv_append(datetime.fromtimestamp(ts, timezone.utc).isoformat(), amount)
+
+
+def _shutdown() -> None:
+    if _worker is not None and _worker.is_alive():
+        _EXPENSE_Q.put_nowait(None)
+        _worker.join(timeout=5)
+    else:
+        drain_expenses()
+    flush()
+
+
+def _redis_add(totals: Dict[str, float]) -> bool:
+    try:
+        # one round-trip: increments + TTL = 90 days to prevent unbounded growth
+        pipe = _REDIS.client.pipeline(transaction=False)
+        for key, amount in totals.items():
+            pipe.incrbyfloat(key, amount)
+            pipe.expire(key, 90 * 24 * 3600)
+        pipe.execute()
+        return True
+    except Exception:  # pragma: no cover – network errors
+        return False  # fallback to CSV
+
+
+def _csv_append(iso_date: str, amount: float) -> None:
+    # CSV fallback (append-only, one line per update, written in batches)
+    with _buf_lock:
+        _buf.append((iso_date, f"{amount:.6f}"))
+        if len(_buf) >= _FLUSH_EVERY or time.monotonic() - _last_flush >= _FLUSH_INTERVAL:
+            _flush_locked()
+    if _worker is None or not _worker.is_alive():  # idle flush is done by the worker thread
+        _start_worker()
+
+
+def flush() -> None:
+    """Write buffered CSV rows to disk."""
+
+    with _buf_lock:
+        _flush_locked()
+
+
+def _flush_locked() -> None:
+    global _fh, _last_flush
+    _last_flush = time.monotonic()
+    if not _buf:
+        return
+    if _fh is None:
+        _fh = _CSV_PATH.open("a", newline="", encoding="utf-8", buffering=1 << 16)
+    rows = list(_buf)
+    _buf.clear()
+    csv.writer(_fh).writerows(rows)
+    _fh.flush()
+    os.fsync(_fh.fileno())
+
 
-    # CSV fallback (append-only, one line per update)
-    with _CSV_PATH.open("a", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow([date.isoformat(), f"{amount:.6f}"])
\ No newline at end of file
+atexit.register(_shutdown)
\ No newline at end of file
@@ -8,7 +8,7 @@ GroupChatManager может использовать этот словарь, ч
 мере необходимости.
 """
 
-from typing import Callable, Dict
+from typing import Any, Callable, Dict, Optional
 
 # Сопоставление имени события и имени callback‑функции в tools.callbacks
 CALLBACK_NAMES: Dict[str, str] = {
@@ -26,20 +26,44 @@ CALLBACK_NAMES: Dict[str, str] = {
 }
 
 
-def handle_event(event_name: str, *args, **kwargs) -> None:
-    """Вызвать callback, ассоциированный с событием.
+# Пространство имён tools.callbacks; импортируется при первом событии
+_CALLBACKS_NS: Optional[Dict[str, Any]] = None
 
-    Динамически извлекает функцию из модуля tools.callbacks, чтобы
-    поддерживать monkeypatch в тестах.
-    """
-    from tools import callbacks  # импорт внутри для актуальных ссылок
 
+def _callbacks_ns() -> Dict[str, Any]:
+    global _CALLBACKS_NS
+    if _CALLBACKS_NS is None:
+        from tools import callbacks
+
+        _CALLBACKS_NS = vars(callbacks)
+    return _CALLBACKS_NS
+
+
+def _resolve(event_name: str) -> Callable[..., None]:
     func_name = CALLBACK_NAMES.get(event_name)
     if not func_name:
         raise ValueError(f"Неизвестный callback для события: {event_name}")
 
-    callback: Callable[..., None] | None = getattr(callbacks, func_name, None)
+    callback: Callable[..., None] | None = (_CALLBACKS_NS or _callbacks_ns()).get(func_name)
     if callback is None:
         raise ValueError(f"Callback '{func_name}' не найден в tools.callbacks")
+    return callback
+
+
+def handle_event(event_name: str, *args, **kwargs) -> None:
+    """Вызвать callback, ассоциированный с событием.
+
+    Callback ищется в живом ``vars(tools.callbacks)``, поэтому monkeypatch
+    в тестах продолжает работать без повторного импорта на каждый вызов.
+    """
+    _resolve(event_name)(*args, **kwargs)
+
+
+def dispatch0(event_name: str) -> None:
+    """handle_event без аргументов — без упаковки *args/**kwargs."""
+    _resolve(event_name)()
+
 
-    callback(*args, **kwargs)
+def dispatch1(event_name: str, arg) -> None:
+    """handle_event с одним позиционным аргументом (самый частый случай)."""
+    _resolve(event_name)(arg)
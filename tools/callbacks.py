@@ -9,27 +9,179 @@ Callbacks вызываются агентами в ответ на опреде
 интеграционных механизмов и должна быть дополнена.
 """
 
-from typing import Any, Dict, Optional, Callable
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, Callable, Set, Union
+import asyncio
+import atexit
+import inspect
 import logging
+import threading
 
-from .budget_manager import BudgetManager
+from .budget_manager import get_budget_manager
 from .llm_selector import retry_with_higher_tier, downgrade_with_budget
-from .multitool import register_tool_version
+from .multitool import call as multitool_call, register_app_version, register_tool_version
 from .validation import validate_tool_params
 import urllib.request
 
-# Простой экземпляр менеджера бюджета
-budget_manager = BudgetManager(daily_limit=100.0)
+logger = logging.getLogger(__name__)
 
-# Хранилище функции отправки сообщений в Telegram.
-_telegram_sender: Optional[Callable[[str], None]] = None
+# Хранилище функции отправки сообщений в Telegram (sync или async).
+TelegramSender = Callable[[str], Union[None, Awaitable[None]]]
+_telegram_sender: Optional[TelegramSender] = None
+_telegram_sender_is_async = False
+_telegram_batcher: Optional["_TelegramBatcher"] = None
 
+# Склейка исходящих сообщений: Telegram ограничивает ~1 msg/s на чат
+TG_BATCH_MAX = 20  # сообщений в очереди — отправить сразу
+TG_BATCH_INTERVAL = 0.5  # иначе отправка раз в столько секунд
+TG_MESSAGE_LIMIT = 4096  # максимальная длина sendMessage
+TG_STOP_TIMEOUT = 5.0  # сколько ждать досылки очереди при остановке
 
-def register_telegram_sender(func: Callable[[str], None]) -> None:
-    """Register a callable used to send messages to Telegram."""
+# Ссылки на фоновые задачи, чтобы их не собрал GC до завершения
+_pending_tasks: Set[asyncio.Task] = set()
 
-    global _telegram_sender
+
+# Тяжёлые интеграции импортируются при первом событии и кэшируются:
+# повторные вызовы не берут import lock и не ходят в sys.modules.
+@lru_cache(maxsize=None)
+def _get_deployers():
+    from .instance_factory import auto_deploy_instance, deploy_instance
+
+    return auto_deploy_instance, deploy_instance
+
+
+@lru_cache(maxsize=None)
+def _get_create_workflow():
+    from .wf_builder import create_workflow
+
+    return create_workflow
+
+
+@lru_cache(maxsize=None)
+def _get_create_agent_prompt():
+    from .prompt_builder import create_agent_prompt
+
+    return create_agent_prompt
+
+
+@lru_cache(maxsize=None)
+def _get_search_and_store():
+    from .researcher import search_and_store
+
+    return search_and_store
+
+
+@lru_cache(maxsize=None)
+def _get_agent_builder_cls():
+    from agents.core_agents import AgentBuilderAgent
+
+    return AgentBuilderAgent
+
+
+def _pack_messages(messages: List[str], limit: int = TG_MESSAGE_LIMIT) -> Iterator[str]:
+    """Склеить сообщения через ``\n`` в куски не длиннее ``limit``.
+
+    Сообщение длиннее лимита уходит отдельным куском как есть.
+    """
+    chunk: List[str] = []
+    size = 0
+    for msg in messages:
+        extra = len(msg) + (1 if chunk else 0)
+        if chunk and size + extra > limit:
+            yield "\n".join(chunk)
+            chunk, size, extra = [], 0, len(msg)
+        chunk.append(msg)
+        size += extra
+    if chunk:
+        yield "\n".join(chunk)
+
+
+class _TelegramBatcher:
+    """Фоновая склейка сообщений для синхронного отправителя.
+
+    ``put`` только добавляет в очередь; поток отправляет накопленное, когда
+    набралось ``TG_BATCH_MAX`` сообщений или прошло ``TG_BATCH_INTERVAL``.
+    """
+
+    def __init__(self, send: Callable[[str], None]) -> None:
+        self._send = send
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="tg-batcher", daemon=True)
+        self._thread.start()
+
+    def put(self, message: str) -> None:
+        self._queue.append(message)
+        if len(self._queue) >= TG_BATCH_MAX:
+            self._wake.set()
+
+    def flush(self) -> None:
+        # put() только добавляет справа, поэтому len() снимков не врёт
+        batch = [self._queue.popleft() for _ in range(len(self._queue))]
+        for text in _pack_messages(batch):
+            try:
+                self._send(text)
+            except Exception as exc:
+                logger.error("[TG] Ошибка отправки: %s", exc)
+
+    def stop(self, timeout: float = TG_STOP_TIMEOUT) -> None:
+        self._stopped = True
+        self._wake.set()
+        # Зависший отправитель не должен вешать выход процесса (вызов из atexit)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("[TG] Отправка не завершилась за %s с, остаток очереди потерян", timeout)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(TG_BATCH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+
+def _stop_telegram_batcher() -> None:
+    global _telegram_batcher
+    if _telegram_batcher is not None:
+        _telegram_batcher.stop()
+        _telegram_batcher = None
+
+
+atexit.register(_stop_telegram_batcher)
+
+
+def register_telegram_sender(func: TelegramSender, coalesce: bool = False) -> None:
+    """Register a callable used to send messages to Telegram.
+
+    Принимается и корутинная функция: тогда отправка не блокирует event loop.
+    Синхронный отправитель при ``coalesce=True`` вызывается из фонового потока
+    со склеенными сообщениями, а ``outgoing_to_telegram`` возвращается сразу;
+    срочные сообщения (``immediate=True``) склейку обходят.
+    """
+
+    global _telegram_sender, _telegram_sender_is_async, _telegram_batcher
+    _stop_telegram_batcher()
     _telegram_sender = func
+    _telegram_sender_is_async = inspect.iscoroutinefunction(func)
+    if coalesce and not _telegram_sender_is_async:
+        _telegram_batcher = _TelegramBatcher(func)
+
+
+def _run_detached(coro: Awaitable[None]) -> None:
+    """Запустить корутину из синхронного кода.
+
+    Внутри работающего loop — фоновая задача, без него — ``asyncio.run``.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(coro)
+        return
+    task = loop.create_task(coro)
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
 
 
 def route_instance_creation(params: Dict[str, Any]) -> None:
@@ -43,13 +195,12 @@ def route_instance_creation(params: Dict[str, Any]) -> None:
         развёртывания внутреннего или клиентского инстанса. После успешного
         развертывания информация должна быть добавлена в config/instances.yaml.
     """
-    logging.info(f"[callback] route_instance_creation called with {params}")
+    logger.info("[callback] route_instance_creation called with %s", params)
     instance_type = params.get("type", "internal")
     env: Dict[str, str] = params.get("env", {})
     auto = params.get("auto", True)
     try:
-        from .instance_factory import auto_deploy_instance, deploy_instance
-
+        auto_deploy_instance, deploy_instance = _get_deployers()
         if auto:
             name = auto_deploy_instance(instance_type, env)
         else:
@@ -57,14 +208,15 @@ def route_instance_creation(params: Dict[str, Any]) -> None:
             name = params.get("name", instance_type)
             deploy_instance(directory, env, name, instance_type)
 
-        print(f"[Instance-Factory] Инстанс {name} запущен")
+        logger.info("[Instance-Factory] Инстанс %s запущен", name)
+        # Отдельной категории для инстансов в реестре нет — храним среди apps;
+        # значения env (токены, ключи) в реестр не пишем
         try:
-            register_instance_version(name, {"type": instance_type, "env": env})
-        except Exception:
-            pass
+            register_app_version(name, {"type": instance_type, "env_keys": sorted(env)})
+        except Exception as exc:
+            logger.warning("[Instance-Factory] Не удалось записать версию %s: %s", name, exc)
     except Exception as exc:  # pragma: no cover - optional integration
-        logging.error("[callback] instance creation failed: %s", exc)
-        print(f"[Instance-Factory] Ошибка развёртывания: {exc}")
+        logger.error("[Instance-Factory] Ошибка развёртывания: %s", exc)
 
 
 def route_workflow(params: Dict[str, Any]) -> None:
@@ -73,16 +225,15 @@ def route_workflow(params: Dict[str, Any]) -> None:
     Args:
         params: словарь со спецификацией workflow
     """
-    logging.info(f"[callback] route_workflow called with {params}")
+    logger.info("[callback] route_workflow called with %s", params)
     spec = params.get("spec", "")
     n8n_url = params.get("n8n_url") or "http://localhost:5678"
     api_key = params.get("api_key") or ""
     try:
-        from .wf_builder import create_workflow
-        result = create_workflow(spec, n8n_url, api_key)
-        print(f"[WF‑Builder] Workflow создан: {result}")
+        result = _get_create_workflow()(spec, n8n_url, api_key)
+        logger.info("[WF‑Builder] Workflow создан: %s", result)
     except Exception as exc:
-        print(f"[WF‑Builder] Ошибка генерации workflow: {exc}")
+        logger.error("[WF‑Builder] Ошибка генерации workflow: %s", exc)
 
 
 def route_missing_tool(tool_name: str) -> None:
@@ -91,16 +242,13 @@ def route_missing_tool(tool_name: str) -> None:
     Args:
         tool_name: имя инструмента, который отсутствует
     """
-    logging.info(f"[callback] route_missing_tool called for tool: {tool_name}")
+    logger.info("[callback] route_missing_tool called for tool: %s", tool_name)
     try:
-        from .prompt_builder import create_agent_prompt
-
         prompt_text = f"Placeholder prompt for tool {tool_name}"
-        create_agent_prompt(tool_name, prompt_text)
-        print(f"[Agent-Builder] Инструмент {tool_name} создан")
+        _get_create_agent_prompt()(tool_name, prompt_text)
+        logger.info("[Agent-Builder] Инструмент %s создан", tool_name)
     except Exception as exc:  # pragma: no cover - optional integration
-        logging.error("[callback] tool generation failed: %s", exc)
-        print(f"[Prompt-Builder] Не удалось создать инструмент {tool_name}: {exc}")
+        logger.error("[Prompt-Builder] Не удалось создать инструмент %s: %s", tool_name, exc)
 
 
 def retry_with_higher_tier_callback(current_tier: str, attempt: int) -> None:
@@ -110,53 +258,75 @@ def retry_with_higher_tier_callback(current_tier: str, attempt: int) -> None:
         current_tier: текущий уровень модели
         attempt: номер попытки
     """
-    new_tier, model = retry_with_higher_tier(current_tier, attempt, budget_manager)
-    logging.info(
-        f"[callback] retry_with_higher_tier from {current_tier} attempt {attempt} -> {new_tier} model {model}"
+    new_tier, model = retry_with_higher_tier(current_tier, attempt, get_budget_manager())
+    logger.info(
+        "[Model‑Selector] Повышаем уровень с %s (попытка %s) до %s: %s", current_tier, attempt, new_tier, model
     )
-    print(f"[Model‑Selector] Повышаем уровень с {current_tier} до {new_tier}: {model}")
 
 
 def budget_guard_callback(current_tier: str, attempt: int = 0) -> None:
     """Проверить бюджет и при необходимости понизить уровень модели."""
-    new_tier, model = downgrade_with_budget(current_tier, budget_manager, attempt)
+    manager = get_budget_manager()
+    # Обычный случай — бюджет далёк от порога: каскад не пересчитываем
+    if manager.is_within_safe_margin():
+        logger.info("[callback] budget_guard budget within limits")
+        return
+    new_tier, model = downgrade_with_budget(current_tier, manager, attempt)
     if new_tier != current_tier:
-        logging.info(
-            f"[callback] budget_guard downgrade {current_tier} -> {new_tier} model {model}"
+        logger.warning(
+            "[BudgetGuard] Лимит бюджета достигнут, %s -> %s: %s", current_tier, new_tier, model
         )
-        print(f"[BudgetGuard] Лимит бюджета достигнут, переходим на {new_tier}: {model}")
     else:
-        logging.info("[callback] budget_guard budget within limits")
+        logger.info("[callback] budget_guard budget within limits")
 
 
-def outgoing_to_telegram(message: str) -> None:
+def outgoing_to_telegram(message: str, immediate: bool = False) -> None:
     """Отправить сообщение пользователю через Telegram.
 
     Args:
         message: текст ответа
+        immediate: отправить сразу, минуя склейку (алерты безопасности и т. п.)
 
     Note:
         В рабочей системе здесь используется Telegram‑бот (см. modern_telegram_bot.py),
-        который пересылает ответы пользователю. В заглушке сообщение печатается в консоль.
+        который пересылает ответы пользователю. В заглушке сообщение пишется в лог.
     """
-    logging.info(f"[callback] outgoing_to_telegram: {message}")
-    if _telegram_sender is not None:
+    logger.info("[callback] outgoing_to_telegram: %s", message)
+    if _telegram_sender is None:
+        logger.info("[TG] %s", message)
+    elif _telegram_batcher is not None and not immediate:
+        _telegram_batcher.put(message)
+    elif _telegram_sender_is_async:
+        _run_detached(_telegram_sender(message))
+    else:
         _telegram_sender(message)
+
+
+async def aoutgoing_to_telegram(message: str, immediate: bool = False) -> None:
+    """Async-версия :func:`outgoing_to_telegram`.
+
+    Синхронный отправитель уходит в поток, чтобы не блокировать event loop.
+    """
+    logger.info("[callback] outgoing_to_telegram: %s", message)
+    if _telegram_sender is None:
+        logger.info("[TG] %s", message)
+    elif _telegram_batcher is not None and not immediate:
+        _telegram_batcher.put(message)
+    elif _telegram_sender_is_async:
+        await _telegram_sender(message)
     else:
-        print(f"[TG] {message}")
+        await asyncio.to_thread(_telegram_sender, message)
 
 
 def research_validation_cycle(query: str) -> None:
     """Выполнить цикл исследование → валидация."""
 
-    logging.info("[callback] research_validation_cycle: %s", query)
-    from .researcher import search_and_store
-
-    results = search_and_store(query)
+    logger.info("[callback] research_validation_cycle: %s", query)
+    results = _get_search_and_store()(query)
     if results:
-        print(f"[ResearchFlow] сохранено {len(results)} результатов по запросу '{query}'")
+        logger.info("[ResearchFlow] сохранено %s результатов по запросу '%s'", len(results), query)
     else:
-        print(f"[ResearchFlow] не удалось подтвердить источники для '{query}'")
+        logger.warning("[ResearchFlow] не удалось подтвердить источники для '%s'", query)
 
 
 def create_agent_callback(spec: Dict[str, Any]) -> None:
@@ -167,15 +337,13 @@ def create_agent_callback(spec: Dict[str, Any]) -> None:
         role: str
         tier/model/prompt/routes: опционально
     """
-    logging.info("[callback] create_agent_callback: %s", spec)
+    logger.info("[callback] create_agent_callback: %s", spec)
     try:
-        from agents.core_agents import AgentBuilderAgent
-        builder = AgentBuilderAgent()
+        builder = _get_agent_builder_cls()()
         builder.build(spec)
-        print(f"[Agent-Builder] Агент '{spec.get('name')}' создан и зарегистрирован")
+        logger.info("[Agent-Builder] Агент '%s' создан и зарегистрирован", spec.get('name'))
     except Exception as exc:
-        logging.error("[callback] agent creation failed: %s", exc)
-        print(f"[Agent-Builder] Ошибка создания агента: {exc}")
+        logger.error("[Agent-Builder] Ошибка создания агента: %s", exc)
 
 
 def register_tool_callback(params: Dict[str, Any]) -> None:
@@ -186,28 +354,40 @@ def register_tool_callback(params: Dict[str, Any]) -> None:
         docs_url: str (optional)
         auth: dict (optional)
     """
-    logging.info("[callback] register_tool_callback: %s", params)
+    logger.info("[callback] register_tool_callback: %s", params)
     try:
-        from .multitool import call
         # Демонстрационный вызов, в реальной системе — регистрация адаптера и smoke‑тест.
         ok, msg = validate_tool_params(params)
         if not ok:
-            logging.warning("[register_tool_callback] invalid params: %s", msg)
+            logger.warning("[register_tool_callback] invalid params: %s", msg)
         docs_url = params.get("docs_url")
         if docs_url:
             try:
                 with urllib.request.urlopen(docs_url, timeout=5) as r:  # nosec - простая проверка доступности
                     if r.status != 200:
-                        logging.warning("[register_tool_callback] docs_url status: %s", r.status)
+                        logger.warning("[register_tool_callback] docs_url status: %s", r.status)
             except Exception as e:
-                logging.warning("[register_tool_callback] docs_url fetch error: %s", e)
-        call("register_tool", params)
+                logger.warning("[register_tool_callback] docs_url fetch error: %s", e)
+        multitool_call("register_tool", params)
         # Фиксируем доступность инструмента в реестре версий
         api_name = params.get("api_name") or params.get("name")
         if api_name:
             meta = {k: v for k, v in params.items() if k != "auth"}
             register_tool_version(str(api_name), meta)
-        print(f"[MultiTool] Инструмент '{params.get('api_name')}' зарегистрирован")
+        logger.info("[MultiTool] Инструмент '%s' зарегистрирован", params.get('api_name'))
     except Exception as exc:
-        logging.error("[callback] tool registration failed: %s", exc)
-        print(f"[MultiTool] Ошибка регистрации инструмента: {exc}")
+        logger.error("[MultiTool] Ошибка регистрации инструмента: %s", exc)
+
+
+# Async-обёртки для вызова из event loop: сетевые вызовы (n8n, поиск,
+# проверка docs_url) выполняются в потоке и не блокируют другие сессии.
+async def aroute_workflow(params: Dict[str, Any]) -> None:
+    await asyncio.to_thread(route_workflow, params)
+
+
+async def aresearch_validation_cycle(query: str) -> None:
+    await asyncio.to_thread(research_validation_cycle, query)
+
+
+async def aregister_tool_callback(params: Dict[str, Any]) -> None:
+    await asyncio.to_thread(register_tool_callback, params)
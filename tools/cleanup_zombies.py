@@ -5,55 +5,147 @@
 import os
 import sys
 import time
-import signal
+from typing import Dict, List, Optional, Set
 
 try:
     import psutil
-except ImportError:
-    print("❌ Требуется установить psutil: pip install psutil")
-    sys.exit(1)
+except ImportError:  # на Linux достаточно /proc
+    psutil = None
 
+_PROC = "/proc"
 
-def cleanup_zombies():
+
+def _boot_time(proc_root: str = _PROC) -> float:
+    """Время загрузки системы (epoch) из строки ``btime`` в /proc/stat."""
+    with open(os.path.join(proc_root, "stat"), "rb") as f:
+        for line in f:
+            if line.startswith(b"btime "):
+                return float(line.split()[1])
+    return 0.0
+
+
+def _parse_stat(data: bytes):
+    """Разобрать /proc/<pid>/stat: (pid, comm, state, ppid, starttime_ticks).
+
+    comm может содержать пробелы и скобки, поэтому режем по последней ')'.
+    """
+    lpar = data.index(b"(")
+    rpar = data.rindex(b")")
+    rest = data[rpar + 2:].split()
+    # rest[0] — поле 3 (state), rest[19] — поле 22 (starttime)
+    return int(data[:lpar]), data[lpar + 1:rpar], rest[0], int(rest[1]), int(rest[19])
+
+
+def _scan_procfs(proc_root: str = _PROC) -> List[Dict]:
+    """Один проход по /proc/*/stat: один файл на PID, dict — только для зомби.
+
+    Попутно собирается ``pid -> comm``, чтобы имя родителя не читать повторно.
+    """
+    zombies = []
+    name_by_pid: Dict[int, bytes] = {}
+    boot = None
+    ticks = os.sysconf("SC_CLK_TCK")
+    with os.scandir(proc_root) as it:
+        for entry in it:
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(os.path.join(entry.path, "stat"), "rb") as f:
+                    data = f.read()
+            except OSError:  # процесс завершился между scandir и open
+                continue
+            try:
+                rpar = data.rindex(b")")
+                name_by_pid[int(entry.name)] = data[data.index(b"(") + 1:rpar]
+                if data[rpar + 2:rpar + 3] != b"Z":  # state идёт сразу после "comm) "
+                    continue
+                pid, comm, _state, ppid, start = _parse_stat(data)
+            except (ValueError, IndexError):  # пустая или обрезанная запись
+                continue
+            if boot is None:
+                boot = _boot_time(proc_root)
+            zombies.append({
+                "pid": pid,
+                "ppid": ppid,
+                "name": comm.decode(errors="replace"),
+                "create_time": boot + start / ticks,
+            })
+    for zombie in zombies:
+        parent = name_by_pid.get(zombie["ppid"])
+        zombie["parent_name"] = parent.decode(errors="replace") if parent is not None else None
+    return zombies
+
+
+def _scan_psutil() -> List[Dict]:
+    zombies = []
+    name_by_pid = {}
+    for proc in psutil.process_iter(['pid', 'ppid', 'name', 'status', 'create_time']):
+        try:
+            name_by_pid[proc.info['pid']] = proc.info['name']
+            if proc.info['status'] == psutil.STATUS_ZOMBIE:
+                zombies.append(proc.info)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, KeyError):
+            pass
+    for zombie in zombies:
+        zombie['parent_name'] = name_by_pid.get(zombie['ppid'])
+    return zombies
+
+
+def find_zombies() -> List[Dict]:
+    """Найти зомби-процессы: procfs напрямую, psutil — если /proc нет."""
+    if os.path.isdir(_PROC):
+        return _scan_procfs()
+    if psutil is None:
+        print("❌ Нет /proc — требуется psutil: pip install psutil")
+        sys.exit(1)
+    return _scan_psutil()
+
+
+def reap_children() -> Set[int]:
+    """Забрать всех завершившихся потомков текущего процесса.
+
+    waitpid/waitid работают только для своих детей, поэтому зомби с другим
+    родителем здесь не трогаем.
+    """
+    reaped = set()
+    while True:
+        try:
+            result = os.waitid(os.P_ALL, 0, os.WNOHANG | os.WEXITED)
+        except ChildProcessError:  # потомков нет
+            break
+        if result is None:  # остальные потомки ещё живы
+            break
+        reaped.add(result.si_pid)
+    return reaped
+
+
+def cleanup_zombies(zombies: Optional[List[Dict]] = None):
     """Очистка зомби-процессов"""
     zombie_count = 0
     cleaned_count = 0
     
     print("🔍 Поиск зомби-процессов...")
+    if zombies is None:
+        zombies = find_zombies()
+    reaped = reap_children() if any(z['ppid'] == os.getpid() for z in zombies) else set()
+    now = time.time()
     
-    for proc in psutil.process_iter(['pid', 'ppid', 'name', 'status', 'create_time']):
-        try:
-            if proc.info['status'] == psutil.STATUS_ZOMBIE:
-                zombie_count += 1
-                age = time.time() - proc.info['create_time']
-                age_str = f"{int(age/3600)}ч {int((age%3600)/60)}м" if age > 3600 else f"{int(age/60)}м"
-                
-                print(f"🧟 Зомби PID: {proc.info['pid']}, "
-                      f"Имя: {proc.info['name']}, "
-                      f"PPID: {proc.info['ppid']}, "
-                      f"Возраст: {age_str}")
-                
-                # Если родитель - init (PID 1), зомби можно попытаться очистить
-                if proc.info['ppid'] == 1:
-                    try:
-                        # Пытаемся очистить через waitpid
-                        pid, status = os.waitpid(proc.info['pid'], os.WNOHANG)
-                        if pid != 0:
-                            cleaned_count += 1
-                            print(f"  ✅ Очищен зомби PID: {pid}")
-                    except:
-                        print(f"  ❌ Не удалось очистить PID: {proc.info['pid']}")
-                else:
-                    # Если родитель не init, пытаемся послать SIGCHLD родителю
-                    try:
-                        parent = psutil.Process(proc.info['ppid'])
-                        os.kill(proc.info['ppid'], signal.SIGCHLD)
-                        print(f"  📨 Отправлен SIGCHLD родителю PID: {proc.info['ppid']}")
-                    except:
-                        print(f"  ⚠️ Родитель недоступен")
-                        
-        except (psutil.NoSuchProcess, psutil.AccessDenied, KeyError):
-            pass
+    for info in zombies:
+        zombie_count += 1
+        age = now - info['create_time']
+        age_str = f"{int(age/3600)}ч {int((age%3600)/60)}м" if age > 3600 else f"{int(age/60)}м"
+        
+        print(f"🧟 Зомби PID: {info['pid']}, "
+              f"Имя: {info['name']}, "
+              f"PPID: {info['ppid']}, "
+              f"Возраст: {age_str}")
+        
+        if info['pid'] in reaped:
+            cleaned_count += 1
+            print(f"  ✅ Очищен зомби PID: {info['pid']}")
+        else:
+            # Чужого потомка забрать может только его родитель
+            print(f"  ⚠️ Не наш потомок, должен забрать родитель PID: {info['ppid']}")
     
     print(f"\n📊 Статистика:")
     print(f"  Найдено зомби: {zombie_count}")
@@ -64,33 +156,27 @@ def cleanup_zombies():
     elif cleaned_count < zombie_count:
         print("\n⚠️ Некоторые зомби не удалось очистить.")
         print("💡 Попробуйте:")
-        print("   1. Запустить с sudo: sudo python3 cleanup_zombies.py")
+        print("   1. Найти и перезапустить родительские процессы")
         print("   2. Перезагрузить систему")
-        print("   3. Найти и перезапустить родительские процессы")
 
 
-def show_process_tree():
+def show_process_tree(zombies: Optional[List[Dict]] = None):
     """Показать дерево процессов с зомби"""
     print("\n🌳 Дерево процессов с зомби:")
     
-    zombies = []
-    for proc in psutil.process_iter(['pid', 'ppid', 'name', 'status']):
-        try:
-            if proc.info['status'] == psutil.STATUS_ZOMBIE:
-                zombies.append(proc.info)
-        except:
-            pass
+    if zombies is None:
+        zombies = find_zombies()
     
     if zombies:
         for zombie in sorted(zombies, key=lambda x: x['ppid']):
             print(f"  └─ PID: {zombie['pid']} ({zombie['name']}) "
                   f"← Родитель: {zombie['ppid']}")
             
-            # Показываем информацию о родителе
-            try:
-                parent = psutil.Process(zombie['ppid'])
-                print(f"     └─ Родитель: {parent.name()} (PID: {parent.pid})")
-            except:
+            # Имя родителя собрано тем же проходом по /proc
+            parent_name = zombie.get('parent_name')
+            if parent_name is not None:
+                print(f"     └─ Родитель: {parent_name} (PID: {zombie['ppid']})")
+            else:
                 print(f"     └─ Родитель: недоступен")
 
 
@@ -98,7 +184,9 @@ if __name__ == "__main__":
     print("🧹 Утилита очистки зомби-процессов")
     print("=" * 40)
     
-    cleanup_zombies()
-    show_process_tree()
+    # Один проход по /proc на оба отчёта
+    zombies = find_zombies()
+    cleanup_zombies(zombies)
+    show_process_tree(zombies)
     
     print("\n✅ Завершено!")
\ No newline at end of file
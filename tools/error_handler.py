@@ -255,7 +255,7 @@ class ErrorHandler:
         """Уведомить о критической ошибке"""
         # Send to monitoring system
         try:
-            from tools.callbacks import outgoing_to_telegram
+            from tools.callbacks import aoutgoing_to_telegram
             
             message = (
                 f"🚨 КРИТИЧЕСКАЯ ОШИБКА!\n\n"
@@ -267,7 +267,7 @@ class ErrorHandler:
             if context.agent_name:
                 message += f"Агент: {context.agent_name}\n"
             
-            outgoing_to_telegram(message)
+            await aoutgoing_to_telegram(message, immediate=True)
         except Exception:
             pass  # Don't fail on notification error
     
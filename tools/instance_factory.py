@@ -66,10 +66,8 @@ def deploy_instance(directory: str, env_vars: Dict[str, str], instance_name: str
     """
     deploy_dir = REPO_ROOT / directory
     env_path = deploy_dir / ".env"
-    # Создаём .env файл
-    with env_path.open("w", encoding="utf-8") as f:
-        for k, v in env_vars.items():
-            f.write(f"{k}={v}\n")
+    # Создаём .env файл одной записью
+    env_path.write_text("".join(f"{k}={v}\n" for k, v in env_vars.items()), encoding="utf-8")
     # Запускаем docker compose up -d
     result = subprocess.run(["docker", "compose", "up", "-d"], cwd=str(deploy_dir))
 
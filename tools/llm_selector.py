@@ -8,6 +8,7 @@ config/llm_tiers.yaml. Агент Model‑Selector использует `pick_co
 уровень модели при ошибке или недостаточном качестве.
 """
 
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 import logging
@@ -19,17 +20,41 @@ try:
 except ImportError:
     raise RuntimeError("Для работы llm_selector требуется библиотека PyYAML. Установите её: pip install pyyaml")
 
+logger = logging.getLogger(__name__)
+
+
+# Порядок уровней каскада и их целочисленные индексы: переходы между уровнями
+# сводятся к арифметике над int без построения списков на каждом вызове.
+TIER_ORDER: Tuple[str, ...] = ("cheap", "standard", "premium")
+_TIER_INDEX: Dict[str, int] = {name: idx for idx, name in enumerate(TIER_ORDER)}
+_LAST_TIER = len(TIER_ORDER) - 1
+
+
+def _tier_index(tier: str) -> int:
+    idx = _TIER_INDEX.get(tier)
+    if idx is None:
+        raise ValueError(f"Неизвестный tier: {tier}")
+    return idx
+
+
+@lru_cache(maxsize=8)
+def _load_tiers_cached(path: Path, mtime_ns: int) -> Dict[str, Any]:
+    with path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
 
 def load_tiers(config_path: str = "config/llm_tiers.yaml") -> Dict[str, Any]:
     """Загрузить YAML‑конфигурацию уровней LLM.
 
+    Разобранный файл кешируется по (путь, mtime): повторные вызовы
+    ``pick_config`` не перечитывают YAML, а правка файла сбрасывает кеш.
+    Результат общий для всех вызовов — не изменяйте его.
+
     Returns:
         Словарь с данными конфигурации.
     """
     path = Path(__file__).parent.parent / config_path
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-    return data
+    return _load_tiers_cached(path, path.stat().st_mtime_ns)
 
 
 def pick_config(
@@ -49,7 +74,7 @@ def pick_config(
     """
     if manager is not None and manager.needs_downgrade() and tier != "cheap":
         tier = previous_tier(tier)
-        logging.warning("Достигнут лимит бюджета; используем уровень %s", tier)
+        logger.warning("Достигнут лимит бюджета; используем уровень %s", tier)
 
     data = load_tiers()
     tiers = data.get("tiers", {})
@@ -57,25 +82,24 @@ def pick_config(
     if not models:
         raise ValueError(f"Неизвестный tier: {tier}")
     index = min(attempt, len(models) - 1)
-    return tier, models[index]
+    # Копия: записи уровня живут в кеше load_tiers
+    return tier, dict(models[index])
 
 
 def next_tier(current_tier: str) -> str:
     """Получить следующий уровень после текущего для повышения каскада."""
-    order = ["cheap", "standard", "premium"]
-    if current_tier not in order:
-        raise ValueError(f"Неизвестный tier: {current_tier}")
-    idx = order.index(current_tier)
-    return order[min(idx + 1, len(order) - 1)]
+    return TIER_ORDER[min(_tier_index(current_tier) + 1, _LAST_TIER)]
 
 
 def previous_tier(current_tier: str) -> str:
     """Получить предыдущий уровень для понижения каскада."""
-    order = ["cheap", "standard", "premium"]
-    if current_tier not in order:
-        raise ValueError(f"Неизвестный tier: {current_tier}")
-    idx = order.index(current_tier)
-    return order[max(idx - 1, 0)]
+    return TIER_ORDER[max(_tier_index(current_tier) - 1, 0)]
+
+
+# (tier, attempt, constrained) -> (tier, model); сбрасывается при смене конфига
+_RETRY_MEMO: Dict[Tuple[str, int, bool], Tuple[str, Dict[str, str]]] = {}
+_RETRY_MEMO_CONFIG: Dict[str, Any] | None = None
+_RETRY_MEMO_MAX = 64
 
 
 def retry_with_higher_tier(
@@ -93,21 +117,36 @@ def retry_with_higher_tier(
     3. В иных случаях повышаем уровень (cheap → standard → premium).
     """
 
-    # Бюджет не позволяет повышаться — остаёмся на месте
-    if manager is not None and manager.needs_downgrade():
-        logging.info("Budget constraint: staying on %s tier", current_tier)
-        return pick_config(current_tier, attempt=attempt, manager=manager)
-
     config = load_tiers()
+    constrained = manager is not None and manager.needs_downgrade()
     max_retries = config.get("max_retries", 3)
-    # Если количество попыток превышает max_retries, остаёмся на текущем уровне
-    if attempt >= max_retries:
-        logging.warning("Достигнут лимит повторных попыток; остаёмся на текущем уровне.")
-        return pick_config(current_tier, attempt=attempt, manager=manager)
-
-    # Иначе повышаем уровень
-    next_level = next_tier(current_tier)
-    return pick_config(next_level, attempt=0, manager=manager)
+    if constrained:
+        # Бюджет не позволяет повышаться — остаёмся на месте
+        logger.info("Budget constraint: staying on %s tier", current_tier)
+    elif attempt >= max_retries:
+        # Если количество попыток превышает max_retries, остаёмся на текущем уровне
+        logger.warning("Достигнут лимит повторных попыток; остаёмся на текущем уровне.")
+
+    # Результат зависит только от (tier, attempt, constrained) и конфига:
+    # при шторме повторов он берётся из памяти без второго load_tiers/stat
+    global _RETRY_MEMO_CONFIG
+    if config is not _RETRY_MEMO_CONFIG:
+        _RETRY_MEMO.clear()
+        _RETRY_MEMO_CONFIG = config
+    key = (current_tier, attempt, constrained)
+    hit = _RETRY_MEMO.get(key)
+    if hit is None:
+        if constrained or attempt >= max_retries:
+            hit = pick_config(current_tier, attempt=attempt, manager=manager)
+        else:
+            # Иначе повышаем уровень
+            hit = pick_config(next_tier(current_tier), attempt=0, manager=manager)
+        if len(_RETRY_MEMO) >= _RETRY_MEMO_MAX:
+            _RETRY_MEMO.clear()
+        _RETRY_MEMO[key] = hit
+    tier, model = hit
+    # Копия: закешированный словарь модели общий
+    return tier, dict(model)
 
 
 def downgrade_with_budget(
@@ -116,7 +155,7 @@ def downgrade_with_budget(
     """Понизить уровень модели, если бюджет на исходе."""
     if manager.needs_downgrade() and current_tier != "cheap":
         lower = previous_tier(current_tier)
-        logging.warning(
+        logger.warning(
             "Достигнут лимит бюджета; понижаем уровень с %s до %s", current_tier, lower
         )
         return pick_config(lower, attempt=attempt)
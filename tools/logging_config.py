@@ -3,12 +3,27 @@
 Предотвращает переполнение диска логами
 """
 
+import atexit
 import os
 import logging
 import logging.handlers
+import queue
 from pathlib import Path
 from typing import Optional
 
+# Фоновый поток записи логов (см. setup_logging(use_queue=True))
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # дописывает оставшиеся записи
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
 
 def setup_logging(
     log_level: str = "INFO",
@@ -16,7 +31,8 @@ def setup_logging(
     max_file_size: int = 50 * 1024 * 1024,  # 50MB
     backup_count: int = 5,  # Держим 5 файлов = максимум 250MB
     enable_console: bool = True,
-    enable_file: bool = True
+    enable_file: bool = True,
+    use_queue: bool = True
 ) -> logging.Logger:
     """
     Настройка логирования с ротацией файлов
@@ -28,6 +44,8 @@ def setup_logging(
         backup_count: Количество старых файлов для хранения (5 файлов)
         enable_console: Включить вывод в консоль
         enable_file: Включить запись в файл
+        use_queue: Писать через QueueHandler: вызов логгера только кладёт
+            запись в очередь, I/O выполняет фоновый QueueListener
     """
     
     # Создаем директорию если не существует
@@ -39,7 +57,9 @@ def setup_logging(
     logger.setLevel(getattr(logging, log_level.upper()))
     
     # Очищаем старые handlers
+    _stop_listener()
     logger.handlers.clear()
+    handlers = []
     
     # Формат логов
     formatter = logging.Formatter(
@@ -52,7 +72,7 @@ def setup_logging(
         console_handler = logging.StreamHandler()
         console_handler.setLevel(getattr(logging, log_level.upper()))
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
     # Файловый handler с ротацией
     if enable_file:
@@ -64,7 +84,19 @@ def setup_logging(
         )
         file_handler.setLevel(getattr(logging, log_level.upper()))
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if use_queue and handlers:
+        global _listener
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     # Ограничиваем болтливые библиотеки
     logging.getLogger('urllib3').setLevel(logging.WARNING)
@@ -78,7 +110,10 @@ def setup_logging(
     logging.getLogger('autogen').setLevel(logging.WARNING)  # AutoGen очень болтливый
     logging.getLogger('asyncio').setLevel(logging.WARNING)
     
-    logger.info(f"🔧 Логирование настроено: уровень {log_level}, файлы до {max_file_size//1024//1024}MB, {backup_count} бэкапов")
+    logger.info(
+        "🔧 Логирование настроено: уровень %s, файлы до %sMB, %s бэкапов",
+        log_level, max_file_size // 1024 // 1024, backup_count,
+    )
     return logger
 
 
@@ -34,6 +34,24 @@ MAX_RETRIES = int(os.getenv("N8N_RETRIES", "3"))
 BACKOFF_BASE = float(os.getenv("N8N_BACKOFF", "1.5"))  # seconds
 
 
+# Общая keep-alive сессия: все клиенты переиспользуют соединения из одного пула
+POOL_MAXSIZE = int(os.getenv("N8N_POOL_MAXSIZE", "32"))
+_SESSION: Optional["requests.Session"] = None  # type: ignore[name-defined]
+
+
+def get_http_session() -> Any:
+    """Вернуть общую ``requests.Session`` (создаётся при первом вызове)."""
+    global _SESSION
+    if _SESSION is None:
+        if not hasattr(requests, "Session"):  # pragma: no cover - requests не установлен
+            return requests
+        _SESSION = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=POOL_MAXSIZE)
+        _SESSION.mount("http://", adapter)
+        _SESSION.mount("https://", adapter)
+    return _SESSION
+
+
 class N8NClient:
     """Минималистичный клиент для работы с API n8n."""
 
@@ -59,7 +77,7 @@ class N8NClient:
         backoff = BACKOFF_BASE
         for attempt in range(1, MAX_RETRIES + 1):
             try:
-                resp = requests.request(method, url, timeout=TIMEOUT, **kwargs)  # type: ignore[arg-type]
+                resp = get_http_session().request(method, url, timeout=TIMEOUT, **kwargs)
                 if resp.status_code >= 500:
                     raise RuntimeError(f"{resp.status_code} server error")
                 return resp
@@ -8,6 +8,8 @@ observability.py
 на библиотеке `prometheus_client`.
 """
 
+from functools import lru_cache
+
 try:
     from prometheus_client import (
         Counter,
@@ -51,6 +53,45 @@ if Counter and Histogram:
     )
 
 
+@lru_cache(maxsize=256)
+def _agent_metrics(agent: str) -> tuple:
+    """Дочерние метрики агента: ``labels()`` берёт lock и ищет в dict, делаем это один раз."""
+    return (
+        requests_counter.labels(agent=agent),
+        tokens_counter.labels(agent=agent),
+        errors_counter.labels(agent=agent),
+        task_duration.labels(agent=agent),
+        response_time.labels(agent=agent),
+    )
+
+
+def record_batch(
+    agent: str,
+    requests: int = 0,
+    tokens: int = 0,
+    errors: int = 0,
+    duration: float | None = None,
+    rt: float | None = None,
+) -> None:
+    """Записать несколько метрик агента за один вызов.
+
+    Нулевые счётчики и ``None`` для длительностей пропускаются.
+    """
+    if not (Counter and Histogram):
+        return
+    req_c, tok_c, err_c, dur_h, rt_h = _agent_metrics(agent)
+    if requests:
+        req_c.inc(requests)
+    if tokens:
+        tok_c.inc(tokens)
+    if errors:
+        err_c.inc(errors)
+    if duration is not None:
+        dur_h.observe(duration)
+    if rt is not None:
+        rt_h.observe(rt)
+
+
 def start_metrics_server(port: int = 9000) -> None:
     """Start HTTP server that exposes Prometheus metrics."""
 
@@ -8,7 +8,7 @@ prompt (input) and completion (output).
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Tuple
 import functools
 
 import yaml  # type: ignore
@@ -19,6 +19,9 @@ import yaml  # type: ignore
 
 _CONFIG_PATH = Path(__file__).resolve().parents[1] / "config" / "pricing.yaml"
 
+# Integer money unit used by the budget accounting: 1 micro-USD = 1e-6 USD.
+MICROS_PER_USD = 1_000_000
+
 
 @functools.lru_cache(maxsize=1)
 def _load() -> Dict[str, Dict[str, float]]:
@@ -27,10 +30,41 @@ def _load() -> Dict[str, Dict[str, float]]:
     return data.get("models", {})
 
 
+@functools.lru_cache(maxsize=1)
+def _price_table_micros() -> Dict[str, Tuple[int, int]]:
+    """Flatten pricing into ``{model: (prompt, completion)}`` micro-USD per 1K tokens."""
+    table: Dict[str, Tuple[int, int]] = {}
+    for model, info in _load().items():
+        if isinstance(info, dict) and "prompt" in info and "completion" in info:
+            table[model] = (
+                usd_to_micros(float(info["prompt"])),
+                usd_to_micros(float(info["completion"])),
+            )
+    return table
+
+
 # ---------------------------------------------------------------------------
 # Public helpers
 # ---------------------------------------------------------------------------
 
+def usd_to_micros(amount: float) -> int:
+    """Convert a USD amount to integer micro-USD."""
+    return int(round(amount * MICROS_PER_USD))
+
+
+def estimate_cost_micros(model: str, prompt_tokens: int = 0, completion_tokens: int = 0) -> int:
+    """Estimate cost for a single request in integer micro-USD.
+
+    Uses the precomputed price table, so a call is one dict lookup plus
+    integer arithmetic.
+    """
+    try:
+        prompt_price, completion_price = _price_table_micros()[model]
+    except KeyError:
+        raise ValueError(f"No pricing info for {model}") from None
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) // 1000
+
+
 def price_per_token(model: str, kind: str = "prompt") -> float:
     """Return price in USD *per single token*.
 
@@ -69,8 +69,29 @@ def _get_vault_client() -> "hvac.Client | None":  # noqa: D401
 
 
 def get_secret(key: str) -> Optional[str]:
-    """Получить секрет по ключу из Vault, env или локального файла."""
+    """Получить секрет по ключу из env, Vault или локального файла.
 
+    Найденное значение кэшируется на ``_CACHE_TTL`` секунд, отсутствующий
+    ключ не кэшируется. После ротации секрета кэш можно сбросить сразу
+    через ``get_secret.cache_clear()``.
+    """
+
+    # Проверяем кэш
+    now = time.time()
+    cached = _CACHE.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    val = _lookup_secret(key)
+    if val is not None:
+        _CACHE[key] = (now + _CACHE_TTL, val)
+    return val
+
+
+get_secret.cache_clear = _CACHE.clear  # type: ignore[attr-defined]
+
+
+def _lookup_secret(key: str) -> Optional[str]:
     # Сначала пробуем прочитать из переменных окружения
     if val := os.getenv(key):
         return val
@@ -80,17 +101,10 @@ def get_secret(key: str) -> Optional[str]:
     path = os.getenv("VAULT_PATH", "secret/data/mas")
 
     if client is not None:
-        # Проверяем кэш
-        now = time.time()
-        cached = _CACHE.get(key)
-        if cached and cached[0] > now:
-            return cached[1]
-
         try:
             result = client.secrets.kv.v2.read_secret_version(path=path)
             data = result.get("data", {}).get("data", {})  # type: ignore[index]
             if isinstance(data, dict) and key in data:
-                _CACHE[key] = (now + _CACHE_TTL, str(data[key]))
                 return str(data[key])
         except Exception as exc:  # pragma: no cover - network errors
             print(f"[Security] Vault error: {exc}")
@@ -100,8 +114,8 @@ def get_secret(key: str) -> Optional[str]:
     if secrets_file.exists():
         try:
             data = yaml.safe_load(secrets_file.read_text(encoding="utf-8")) or {}
-            if isinstance(data, dict):
-                return data.get(key)
+            if isinstance(data, dict) and data.get(key) is not None:
+                return str(data[key])
         except Exception:
             return None
 
@@ -114,9 +128,9 @@ def approve_global_prompt_change(diff: str) -> bool:
     message = (
         "[Security] Требуется подтверждение изменения глобального промпта:\n" + diff
     )
-    # 1) Отправляем diff в Telegram (если настроен sender)
+    # 1) Отправляем diff в Telegram (если настроен sender) — сразу, без склейки
     try:
-        outgoing_to_telegram(message)
+        outgoing_to_telegram(message, immediate=True)
     except Exception:
         pass
 
@@ -6,10 +6,13 @@ import os
 import json
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Union
+import time
+from collections import Counter
+from typing import Dict, List, Mapping, Optional, Any, Sequence, Union
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from types import MappingProxyType
 
 # AutoGen v0.9+ is used via autogen-agentchat in agent implementations.
 # No direct imports from legacy autogen here.
@@ -22,6 +25,27 @@ from .learning_loop import learning_loop
 # Import interface to implement
 from core.interfaces import IMessageProcessor
 
+try:
+    import orjson  # type: ignore
+
+    def _dumps(entry: Dict[str, Any]) -> str:
+        return orjson.dumps(entry, default=str).decode()
+except ImportError:  # pragma: no cover - optional dependency
+    def _dumps(entry: Dict[str, Any]) -> str:
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _message_json(message: "Message") -> str:
+    # Формат conversations.log: ключи и их порядок менять нельзя
+    return _dumps({
+        "timestamp": message.timestamp.isoformat(),
+        "sender": message.sender,
+        "recipient": message.recipient,
+        "content": message.content,
+        "type": message.message_type,
+        "metadata": message.metadata,
+    })
+
 
 @dataclass
 class Message:
@@ -38,12 +62,26 @@ class Message:
             self.metadata = {}
 
 
+# Маршрутизация по умолчанию: один неизменяемый экземпляр на процесс
+DEFAULT_ROUTING: Mapping[str, Sequence[str]] = MappingProxyType({
+    "communicator": ("meta",),
+    "meta": ("coordination", "researcher", "model_selector"),
+    "coordination": ("agent_builder", "instance_factory"),
+    "researcher": ("fact_checker", "multi_tool"),
+    "model_selector": ("prompt_builder",),
+    "workflow_builder": ("instance_factory",),
+    "webapp_builder": ("instance_factory",),
+})
+
+
 class SmartGroupChatManager(IMessageProcessor):
     """Продвинутый менеджер групповых чатов"""
     
-    def __init__(self, agents: Dict[str, Any] = None, routing: Dict[str, List[str]] = None):
+    def __init__(self, agents: Dict[str, Any] = None, routing: Mapping[str, Sequence[str]] = None):
         self.agents = agents or {}
-        self.routing = routing or {}
+        # Своя копия: register_agent/unregister_agent меняют маршруты, а вызывающий
+        # может передать общий неизменяемый Mapping (например, MappingProxyType)
+        self.routing = dict(routing) if routing else {}
         self.conversation_history: List[Message] = []
         self.active_tasks: Dict[str, Dict] = {}
         self.logger = logging.getLogger(__name__)
@@ -52,6 +90,7 @@ class SmartGroupChatManager(IMessageProcessor):
         self.max_conversation_length = 50
         self.max_retries = 3
         self._initialized = False
+        self._started = time.monotonic()  # для uptime: не зависит от перевода часов
     
     async def initialize(self):
         """Инициализация менеджера группового чата"""
@@ -94,15 +133,7 @@ class SmartGroupChatManager(IMessageProcessor):
         
         # Настраиваем маршрутизацию по умолчанию если не задана
         if not self.routing:
-            self.routing = {
-                "communicator": ["meta"],
-                "meta": ["coordination", "researcher", "model_selector"],
-                "coordination": ["agent_builder", "instance_factory"],
-                "researcher": ["fact_checker", "multi_tool"],
-                "model_selector": ["prompt_builder"],
-                "workflow_builder": ["instance_factory"],
-                "webapp_builder": ["instance_factory"],
-            }
+            self.routing = dict(DEFAULT_ROUTING)
         
         self._initialized = True
         self.logger.info("✅ SmartGroupChatManager инициализирован")
@@ -131,6 +162,20 @@ class SmartGroupChatManager(IMessageProcessor):
             self.logger.error(f"❌ Ошибка обработки сообщения: {e}")
             return f"Извините, произошла ошибка при обработке вашего запроса: {e}"
     
+    async def process_user_messages(self, contents: List[str], user_id: str = "user") -> List[str]:
+        """Пакетная обработка сообщений пользователя.
+        
+        Сообщения отправляются конкурентно через ``asyncio.gather``, поэтому
+        общая задержка определяется самым медленным LLM-вызовом, а не суммой.
+        Порядок ответов совпадает с порядком входных сообщений.
+        """
+        if not contents:
+            return []
+        self.logger.info(f"📦 Пакет из {len(contents)} сообщений от {user_id}")
+        return list(await asyncio.gather(
+            *(self.process_user_message(content, user_id) for content in contents)
+        ))
+    
     async def _route_message_to_agent(self, agent_name: str, message: Message):
         """Маршрутизация сообщения агенту с отслеживанием метрик"""
         if agent_name not in self.agents:
@@ -425,12 +470,8 @@ class SmartGroupChatManager(IMessageProcessor):
     
     def get_agent_statistics(self) -> Dict[str, int]:
         """Статистика активности агентов"""
-        stats = {}
-        for msg in self.conversation_history:
-            if msg.sender not in stats:
-                stats[msg.sender] = 0
-            stats[msg.sender] += 1
-        return stats
+        # Counter считает в C, без проверки и двух обращений к dict на сообщение
+        return dict(Counter(msg.sender for msg in self.conversation_history))
     
     async def create_task(self, task_description: str, assigned_agent: str) -> str:
         """Создание задачи для агента"""
@@ -483,7 +524,7 @@ class SmartGroupChatManager(IMessageProcessor):
             "conversation_length": len(self.conversation_history),
             "active_tasks": len(self.active_tasks),
             "system_health": "healthy",
-            "uptime": datetime.now(timezone.utc).isoformat()
+            "uptime": str(timedelta(seconds=int(time.monotonic() - self._started)))
         }
 
     def _trim_history(self) -> None:
@@ -504,9 +545,16 @@ class SmartGroupChatManager(IMessageProcessor):
                 self.logger.warning("⚠️ Некорректное событие: %s", event)
                 return
             args = event.get("args", [])
-            kwargs = event.get("kwargs", {})
-            from tools.callback_matrix import handle_event
-            handle_event(name, *args, **kwargs)
+            kwargs = event.get("kwargs")
+            from tools.callback_matrix import dispatch0, dispatch1, handle_event
+            if kwargs:
+                handle_event(name, *args, **kwargs)
+            elif len(args) == 1:
+                dispatch1(name, args[0])
+            elif not args:
+                dispatch0(name)
+            else:
+                handle_event(name, *args)
         except Exception as exc:
             self.logger.error("❌ Ошибка обработки события %s от %s: %s", event, sender, exc)
     
@@ -540,16 +588,7 @@ class ConversationLogger:
     
     def log_message(self, message: Message):
         """Логирование сообщения"""
-        log_entry = {
-            "timestamp": message.timestamp.isoformat(),
-            "sender": message.sender,
-            "recipient": message.recipient,
-            "content": message.content,
-            "type": message.message_type,
-            "metadata": message.metadata
-        }
-        
-        self.logger.info(json.dumps(log_entry, ensure_ascii=False))
+        self.logger.info(_message_json(message))
 
 
 # Функции для интеграции с существующей системой
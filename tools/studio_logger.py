@@ -16,6 +16,15 @@ try:
 except Exception:  # pragma: no cover - optional dependency
     requests = None  # type: ignore
 
+try:
+    import orjson  # type: ignore
+
+    def _dumps(entry: dict) -> bytes:
+        return orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:  # pragma: no cover - optional dependency
+    def _dumps(entry: dict) -> bytes:
+        return json.dumps(entry, ensure_ascii=False).encode("utf-8")
+
 # AutoGen Studio configuration
 STUDIO_URL = os.getenv("AUTOGEN_STUDIO_URL", "http://localhost:8081")
 STUDIO_API_KEY = os.getenv("AUTOGEN_STUDIO_API_KEY", "")
@@ -29,8 +38,8 @@ def log_interaction(sender: str, receivers: Iterable[str], message: dict) -> Non
 
     LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
     entry = {"sender": sender, "receivers": list(receivers), "message": message}
-    with LOG_PATH.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    with LOG_PATH.open("ab") as f:
+        f.write(_dumps(entry) + b"\n")
 
 
 def export_logs(dest: str | Path) -> Path:
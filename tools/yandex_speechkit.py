@@ -26,9 +26,64 @@ class YandexSpeechKit:
         self.stt_url = "https://stt.api.cloud.yandex.net/speech/v1/stt:recognize"
         self.tts_url = "https://tts.api.cloud.yandex.net/speech/v1/tts:synthesize"
         
+        # Общая HTTP-сессия: переиспользуем соединения между запросами STT/TTS
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Задача, закрывающая сессию при остановке её event loop
+        self._session_guard: Optional[asyncio.Task] = None
+        
         if not self.api_key or not self.folder_id:
             logger.info("ℹ️ Yandex SpeechKit не настроен. Для включения голосовых функций добавьте YANDEX_API_KEY и YANDEX_FOLDER_ID в .env")
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Получить общую сессию, пересоздав её при смене event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._release_stale_session()
+            self._session = aiohttp.ClientSession()
+            self._session_loop = loop
+            self._session_guard = loop.create_task(self._close_on_shutdown(self._session))
+        return self._session
+    
+    @staticmethod
+    async def _close_on_shutdown(session: aiohttp.ClientSession) -> None:
+        """Ждать отмены и закрыть сессию в её собственном loop.
+
+        asyncio.run отменяет оставшиеся задачи перед закрытием loop, так что
+        соединения сессии закрываются вместе с ним.
+        """
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await session.close()
+    
+    def _release_stale_session(self) -> None:
+        """Освободить сессию, созданную в другом event loop"""
+        old, old_loop = self._session, self._session_loop
+        self._session = self._session_loop = self._session_guard = None
+        if old is None or old.closed:
+            return
+        if old_loop is not None and old_loop.is_running():
+            # Закрываем в её собственном loop: соединения привязаны к нему
+            asyncio.run_coroutine_threadsafe(old.close(), old_loop)
+        else:
+            # Loop остановлен без отмены задач — закрываем коннектор синхронно
+            connector = old.connector
+            old.detach()
+            if connector is not None:
+                connector._close()
+    
+    async def close(self) -> None:
+        """Закрыть общую HTTP-сессию"""
+        guard = self._session_guard
+        if guard is not None and guard.get_loop() is asyncio.get_running_loop():
+            guard.cancel()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+        self._session_guard = None
+    
     async def speech_to_text(
         self, 
         audio_data: bytes, 
@@ -71,33 +126,33 @@ class YandexSpeechKit:
                 }
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.stt_url,
-                    headers=headers,
-                    json=data,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
+            session = await self._get_session()
+            async with session.post(
+                self.stt_url,
+                headers=headers,
+                json=data,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                
+                if response.status == 200:
+                    result = await response.json()
                     
-                    if response.status == 200:
-                        result = await response.json()
-                        
-                        # Извлекаем текст из ответа
-                        if 'result' in result and 'chunks' in result['result']:
-                            chunks = result['result']['chunks']
-                            if chunks and 'alternatives' in chunks[0]:
-                                alternatives = chunks[0]['alternatives']
-                                if alternatives and 'text' in alternatives[0]:
-                                    text = alternatives[0]['text']
-                                    logger.info(f"🎤 Распознано: {text}")
-                                    return text
-                        
-                        logger.warning("⚠️ Пустой результат распознавания")
-                        return None
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ SpeechKit STT error {response.status}: {error_text}")
-                        return None
+                    # Извлекаем текст из ответа
+                    if 'result' in result and 'chunks' in result['result']:
+                        chunks = result['result']['chunks']
+                        if chunks and 'alternatives' in chunks[0]:
+                            alternatives = chunks[0]['alternatives']
+                            if alternatives and 'text' in alternatives[0]:
+                                text = alternatives[0]['text']
+                                logger.info(f"🎤 Распознано: {text}")
+                                return text
+                    
+                    logger.warning("⚠️ Пустой результат распознавания")
+                    return None
+                else:
+                    error_text = await response.text()
+                    logger.error(f"❌ SpeechKit STT error {response.status}: {error_text}")
+                    return None
                         
         except asyncio.TimeoutError:
             logger.error("❌ Timeout при распознавании речи")
@@ -143,22 +198,22 @@ class YandexSpeechKit:
                 'folderId': self.folder_id
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.tts_url,
-                    headers=headers,
-                    data=data,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    
-                    if response.status == 200:
-                        audio_data = await response.read()
-                        logger.info(f"🔊 Синтезирован голос для: {text[:50]}...")
-                        return audio_data
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ SpeechKit TTS error {response.status}: {error_text}")
-                        return None
+            session = await self._get_session()
+            async with session.post(
+                self.tts_url,
+                headers=headers,
+                data=data,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                
+                if response.status == 200:
+                    audio_data = await response.read()
+                    logger.info(f"🔊 Синтезирован голос для: {text[:50]}...")
+                    return audio_data
+                else:
+                    error_text = await response.text()
+                    logger.error(f"❌ SpeechKit TTS error {response.status}: {error_text}")
+                    return None
                         
         except asyncio.TimeoutError:
             logger.error("❌ Timeout при синтезе речи")
@@ -240,13 +295,16 @@ async def test_speechkit():
     
     # Тест TTS
     print("🔊 Тестируем синтез речи...")
-    audio_data = await speechkit.text_to_speech("Привет! Это тест голосового синтеза.")
-    
-    if audio_data:
-        print(f"✅ TTS работает! Размер аудио: {len(audio_data)} байт")
-        await speechkit.save_audio_file(audio_data, "test_output.ogg")
-    else:
-        print("❌ TTS не работает")
+    try:
+        audio_data = await speechkit.text_to_speech("Привет! Это тест голосового синтеза.")
+        
+        if audio_data:
+            print(f"✅ TTS работает! Размер аудио: {len(audio_data)} байт")
+            await speechkit.save_audio_file(audio_data, "test_output.ogg")
+        else:
+            print("❌ TTS не работает")
+    finally:
+        await speechkit.close()
 
 
 if __name__ == "__main__":